@@ -0,0 +1,407 @@
+import argparse
+import gzip
+import hashlib
+import json
+import threading
+import time
+import traceback
+from collections import OrderedDict, namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+import dataset
+import disk_cache
+import tracing
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8502
+# How often the data files are checked for a new version
+RELOAD_INTERVAL = 1.0
+MAX_CACHED_RESPONSES = 4096
+GZIP_MIN_BYTES = 512
+MAX_BATCH_QUERIES = 200
+MAX_BODY_BYTES = 1024 * 1024
+
+ENDPOINTS = ('series', 'latest', 'stats')
+
+# One normalised request: every field is filled in, so equal queries share a cache entry
+Query = namedtuple('Query', ['endpoint', 'iso3', 'categories', 'years', 'corr'])
+
+
+class QueryError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _number(value, digits=10):
+    value = float(value)
+    return None if np.isnan(value) else float(f"{value:.{digits}g}")
+
+
+def _int(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise QueryError(400, f"'{name}' must be a year") from None
+
+
+def _encode(payload):
+    return json.dumps(payload, separators=(',', ':'), allow_nan=False).encode()
+
+
+def _error_body(status, message):
+    return _encode({'error': message, 'status': status})
+
+
+def series_result(store, query):
+    window = store.window(query.years, query.iso3)
+    result = {}
+    for category in query.categories:
+        series = window[category].dropna()
+        result[category] = {
+            'unit': store.units.get(category, ''),
+            'years': series.index.tolist(),
+            # Values are float32, so 7 significant digits round-trip them
+            'values': [_number(v, 7) for v in series.to_numpy()],
+        }
+    return result
+
+
+def latest_result(store, query):
+    result = {}
+    for category in query.categories:
+        latest = store.latest(category, query.years, query.iso3)
+        result[category] = None if latest is None else {
+            'year': latest[0], 'value': _number(latest[1], 7), 'unit': latest[2]}
+    return result
+
+
+def stats_result(store, query):
+    stats = store.range_stats(query.iso3)
+    result = {category: {
+        'count': stats.count(category, query.years),
+        'mean': _number(stats.mean(category, query.years)),
+        'std': _number(stats.std(category, query.years)),
+        'growth_mean': _number(stats.growth_mean(category, query.years)),
+        'growth_std': _number(stats.growth_std(category, query.years)),
+    } for category in query.categories}
+    if query.corr:
+        matrix = stats.corr_matrix(list(query.categories), query.years).to_numpy()
+        return {'indicators': result, 'corr': [[_number(v) for v in row] for row in matrix]}
+    return {'indicators': result}
+
+
+RESULTS = {'series': series_result, 'latest': latest_result, 'stats': stats_result}
+
+
+class IndicatorService:
+    """Answers indicator queries from an IndicatorStore, as the dashboard does.
+
+    The store holds every country and is loaded with dataset.load_store through
+    the shared disk cache, under the same key as the report renderer's, so API
+    and report processes on the host parse it once between them. (The
+    dashboard caches a single country's store under its own key.) The
+    data files are re-checked every RELOAD_INTERVAL seconds; a new version
+    replaces the store and drops every cached response.
+    """
+
+    def __init__(self, path=dataset.DATASET_DIR, csv_path=dataset.CSV_PATH, cache=None,
+                 max_responses=MAX_CACHED_RESPONSES):
+        self.path = path
+        self.csv_path = csv_path
+        self.cache = cache
+        self.max_responses = max_responses
+        self._store = None
+        self._source = None
+        self._checked = 0.0
+        self._responses = OrderedDict()
+        self._lock = threading.Lock()
+        # Display names also answer to the FAOSTAT item names they were shortened from
+        self._aliases = dict(dataset.CATEGORIES)
+
+    def store(self):
+        now = time.monotonic()
+        if self._store is not None and now - self._checked < RELOAD_INTERVAL:
+            return self._store
+        with self._lock:
+            if self._store is None or now - self._checked >= RELOAD_INTERVAL:
+                source = dataset.source_fingerprint(self.path, self.csv_path)
+                if source != self._source:
+                    with tracing.span('api: load_store'):
+                        self._store = dataset.load_store(None, self.path, self.csv_path,
+                                                         cache=self.cache, fingerprint=source)
+                    self._source = source
+                    self._responses.clear()
+                self._checked = now
+        return self._store
+
+    def query(self, endpoint, iso3=None, categories=None, years=None, corr=False):
+        store = self.store()
+        # Batch items are arbitrary JSON, so every field is type checked before use
+        if not isinstance(endpoint, str) or endpoint not in ENDPOINTS:
+            raise QueryError(404, f"Unknown endpoint '{endpoint}'")
+        if iso3 is not None and not isinstance(iso3, str):
+            raise QueryError(400, "'iso3' must be a string")
+        iso3 = (iso3 or store.default_iso3 or '').upper()
+        if iso3 not in store.panels:
+            raise QueryError(404, f"No data for Iso3 '{iso3}'")
+        available = list(store.panels[iso3].columns)
+        if isinstance(categories, str):
+            categories = [categories]
+        if categories is not None and (not isinstance(categories, (list, tuple))
+                                       or not all(isinstance(c, str) for c in categories)):
+            raise QueryError(400, "'categories' must be a string or a list of strings")
+        if categories:
+            names = [self._aliases.get(category, category) for category in categories]
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                raise QueryError(404, f"Unknown category: {', '.join(unknown)}")
+            categories = tuple(dict.fromkeys(names))
+        else:
+            categories = tuple(available)
+        first, last = store.year_bounds()
+        lo = first if years is None or years[0] is None else _int(years[0], 'from')
+        hi = last if years is None or years[1] is None else _int(years[1], 'to')
+        if lo > hi:
+            raise QueryError(400, "'from' is after 'to'")
+        return Query(endpoint, iso3, categories, (lo, hi), bool(corr) and endpoint == 'stats')
+
+    def etag(self, *queries):
+        digest = hashlib.sha1(repr(queries).encode()).hexdigest()[:16]
+        return f'W/"{self.store().version}-{digest}"'
+
+    def result(self, query):
+        store = self.store()
+        return {
+            'iso3': query.iso3,
+            'years': list(query.years),
+            'data': RESULTS[query.endpoint](store, query),
+        }
+
+    def catalog(self):
+        store = self.store()
+        return {
+            'version': store.version,
+            'countries': sorted(store.panels),
+            'years': list(store.year_bounds()),
+            'categories': [{'name': name, 'unit': store.units.get(name, ''),
+                            'items': [item for item, short in dataset.CATEGORIES.items() if short == name]}
+                           for name in store.units],
+            'endpoints': list(ENDPOINTS),
+        }
+
+    # Encoded body for a cache key, building it with make_payload on a miss
+    def response(self, key, make_payload):
+        version = self.store().version
+        with self._lock:
+            body = self._responses.get((version, key))
+            if body is not None:
+                self._responses.move_to_end((version, key))
+                return body
+        body = _encode(dict(make_payload(), version=version))
+        with self._lock:
+            self._responses[(version, key)] = body
+            while len(self._responses) > self.max_responses:
+                self._responses.popitem(last=False)
+        return body
+
+    def batch(self, queries):
+        results = []
+        for item in queries:
+            try:
+                query = self.query(item.get('endpoint'), item.get('iso3'), item.get('categories'),
+                                   (item.get('from'), item.get('to')), item.get('corr', False))
+                results.append(dict(self.result(query), endpoint=query.endpoint))
+            except QueryError as e:
+                results.append({'error': str(e), 'status': e.status})
+            except OSError:
+                # Data that cannot be read fails the whole batch with a 503
+                raise
+            except Exception:
+                # One broken item must not lose the rest of the batch
+                traceback.print_exc()
+                results.append({'error': "Internal server error", 'status': 500})
+        return {'results': results}
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """GET /v1/<series|latest|stats>?iso3=&category=&category=&from=&to=[&corr=1],
+    GET /v1/categories and POST /v1/batch with {"queries": [...]}."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FoodSecurityAPI/1.0'
+    # Headers and body go out as separate writes; with Nagle on, keep-alive clients
+    # wait out a delayed ACK on every response
+    disable_nagle_algorithm = True
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        name = url.path.rstrip('/').rpartition('/v1/')[2] if url.path.startswith('/v1/') else None
+        with tracing.span(f'api: {name}'):
+            self._respond(lambda: self._get(name, url.query))
+
+    # Body and ETag for a GET; the body is None when the client's copy is current
+    def _get(self, name, query_string):
+        if name == 'categories':
+            etag = self.service.etag('categories')
+            if self._is_current(etag):
+                return None, etag
+            return self.service.response('categories', self.service.catalog), etag
+        params = parse_qs(query_string)
+        query = self.service.query(
+            name,
+            params.get('iso3', [None])[-1],
+            params.get('category'),
+            (params.get('from', [None])[-1], params.get('to', [None])[-1]),
+            params.get('corr', ['0'])[-1] not in ('', '0', 'false'),
+        )
+        etag = self.service.etag(query)
+        if self._is_current(etag):
+            return None, etag
+        return self.service.response(query, lambda: self.service.result(query)), etag
+
+    def do_POST(self):
+        if urlsplit(self.path).path.rstrip('/') != '/v1/batch':
+            return self._error(404, "Unknown endpoint")
+        with tracing.span('api: batch'):
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+            except ValueError:
+                length = -1
+            # An unread body would be taken for the next request on this connection
+            if length < 0:
+                self.close_connection = True
+                return self._error(400, "Content-Length must be a non-negative integer")
+            if length > MAX_BODY_BYTES:
+                self.close_connection = True
+                return self._error(413, "Request body too large")
+            try:
+                queries = json.loads(self.rfile.read(length) or b'{}').get('queries', [])
+            except (ValueError, AttributeError):
+                return self._error(400, "Body must be a JSON object with a 'queries' list")
+            if not isinstance(queries, list) or not all(isinstance(q, dict) for q in queries):
+                return self._error(400, "'queries' must be a list of objects")
+            if len(queries) > MAX_BATCH_QUERIES:
+                return self._error(400, f"At most {MAX_BATCH_QUERIES} queries per batch")
+            key = ('batch', json.dumps(queries, sort_keys=True))
+            self._respond(lambda: (self.service.response(key, lambda: self.service.batch(queries)),
+                                   self.service.etag(key)))
+
+    # Build a response with build() -> (body, etag), turning failures into JSON
+    # errors, then send it. Only building is guarded: an OSError while sending is
+    # the client going away, not the indicator data being unreadable.
+    def _respond(self, build):
+        status, etag = 200, None
+        try:
+            body, etag = build()
+        except QueryError as e:
+            status, body = e.status, _error_body(e.status, str(e))
+        except OSError:
+            status, body = 503, _error_body(503, "Indicator data is not available")
+        except Exception:
+            # The traceback goes to the server log; the client still gets an answer
+            traceback.print_exc()
+            status, body = 500, _error_body(500, "Internal server error")
+        if body is None:
+            self._send_not_modified(etag)
+        else:
+            self._send(status, body, etag)
+
+    def _is_current(self, etag):
+        return etag in (self.headers.get('If-None-Match') or '')
+
+    def _send_not_modified(self, etag):
+        self.send_response(304)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', '0')
+        self._finish()
+
+    def _send(self, status, body, etag=None):
+        if len(body) >= GZIP_MIN_BYTES and 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+            body = self.server.compressed(body)
+            encoding = 'gzip'
+        else:
+            encoding = None
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self._finish(body)
+
+    def _finish(self, body=b''):
+        try:
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client hung up; there is nobody left to answer
+            self.close_connection = True
+
+    def _error(self, status, message):
+        self._send(status, _error_body(status, message))
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class QueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service, verbose=False):
+        super().__init__(address, QueryHandler)
+        self.service = service
+        self.verbose = verbose
+        self._compressed = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Compressed copy of a cached body; bodies are immutable bytes, so they key themselves
+    def compressed(self, body):
+        with self._lock:
+            packed = self._compressed.get(body)
+            if packed is not None:
+                self._compressed.move_to_end(body)
+                return packed
+        packed = gzip.compress(body, compresslevel=6, mtime=0)
+        with self._lock:
+            self._compressed[body] = packed
+            while len(self._compressed) > MAX_CACHED_RESPONSES:
+                self._compressed.popitem(last=False)
+        return packed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON query API over the food security indicators")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="Interface to listen on")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument('--csv', default=dataset.CSV_PATH, help="Cleaned CSV")
+    parser.add_argument('--dataset', default=dataset.DATASET_DIR, help="Partitioned Parquet dataset, used when current")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    args = parser.parse_args()
+
+    service = IndicatorService(args.dataset, args.csv, cache=disk_cache.default_cache())
+    store = service.store()
+    server = QueryServer((args.host, args.port), service, verbose=args.verbose)
+    print(f"Serving {len(store.panels)} countries (version {store.version}) on http://{args.host}:{args.port}/v1/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
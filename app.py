@@ -1,12 +1,16 @@
-# Importing relevant libraries
+# Importing relevant libraries. Only light modules are imported here; pandas, plotly,
+# pyarrow and the modules built on them are imported by the pages that use them, so a
+# new server's first page paints before they load (see startup.py).
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from PIL import Image
-import requests
-from io import BytesIO
 import base64
+import mimetypes
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import disk_cache
+import startup
+import tracing
 
 
 # Configuring initial page
@@ -33,117 +37,138 @@ def set_dark_theme():
 
 set_dark_theme()
 
-# Converting image to base64
-def image_to_base64(image):
-    buffered = BytesIO()
-    image.save(buffered, format="PNG")
-    return base64.b64encode(buffered.getvalue()).decode()
+# Render only the selected analysis section instead of building all four tabs every rerun
+LAZY_SECTIONS = os.environ.get('DASHBOARD_LAZY_SECTIONS', '1') != '0'
 
-# Load the Sri Lankan flag with a load spinner
-def load_flag_image():
-    flag_url = "https://raw.githubusercontent.com/sheriffdeenabu/DSPL-ICW/main/Images/download.png"
-    
-    with st.spinner('Loading flag image...'):
-        try:
-            response = requests.get(flag_url)
-            response.raise_for_status()  
-            flag_image = Image.open(BytesIO(response.content))
-            return flag_image
-        except Exception as e:
-            st.error(f"Error loading flag image: {str(e)}")
-            return None
+# How a section's figures are built within a rerun: 'serial', 'thread' or 'process'
+FIGURE_POOL = os.environ.get('DASHBOARD_FIGURE_POOL', 'serial')
+
+# Send every year once and filter years in the browser, so moving the years never reruns the script
+CLIENT_YEARS = os.environ.get('DASHBOARD_CLIENT_YEARS', '0') != '0'
+
+FLAG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Images', 'download.png')
+
+# Read the Sri Lankan flag from the repo once and keep it as a data URI for every session
+@st.cache_resource(show_spinner=False)
+def load_flag_data_uri(path=FLAG_PATH):
+    try:
+        with open(path, 'rb') as image_file:
+            encoded = base64.b64encode(image_file.read()).decode()
+    except OSError:
+        return None
+    mime = mimetypes.guess_type(path)[0] or 'image/png'
+    return f"data:{mime};base64,{encoded}"
+
+# SQLite cache shared by every server process on the host; None when disabled
+@st.cache_resource
+def get_disk_cache():
+    return disk_cache.default_cache()
 
-@st.cache_data
-def load_data():
+# The store for the data currently on disk. Checking the source costs a stat per rerun,
+# and a changed CSV or rebuilt dataset is loaded without restarting the server.
+def load_data(iso3=None):
+    import dataset
+    iso3 = iso3 or dataset.DEFAULT_ISO3
+    try:
+        source = dataset.source_fingerprint()
+    except OSError:
+        source = None
+    return load_store(iso3, source)
+
+# Cached once per process and source version and shared read-only across sessions, so
+# reruns never copy it. Reads the partitioned Parquet dataset when it has been built,
+# otherwise the cleaned CSV, unless another process already stored it in the disk cache.
+@st.cache_resource(max_entries=8)
+def load_store(iso3, source):
+    import dataset
+    import pandas as pd
+    from indicator_store import IndicatorStore
     with st.spinner('Loading and processing data...'):
         try:
-            df = pd.read_csv('suite-of-food-security-indicators_lka-cleaned.csv')
-            categories = {
-                'Average protein supply': 'Protein Supply',
-                'Gross domestic product per capita, PPP,': 'GDP per capita',
-                'Number of people undernourished': 'Undernourishment',
-                'Prevalence of severe food insecurity in the male adult population': 'Male Food Insecurity',
-                'Prevalence of severe food insecurity in the female adult population': 'Female Food Insecurity',
-                'Number of severely food insecure people': 'Severe Food Insecurity count',
-                'Political stability and absence of violence/terrorism': 'Political Stability',
-                'Percentage of population using safely managed drinking water services': 'Safe Water Access',
-                'Percentage of population using at least basic drinking water services': 'Basic Water Access',
-                'Number of obese adults': 'Obesity',
-                'Prevalence of low birthweight': 'Low Birthweight',
-                'Number of newborns with low birthweight': 'Low Birthweight Count'
-            }
-            df['Category'] = df['Item'].str.split('(').str[0].str.strip().replace(categories)
-            df['Unit'] = df['Unit'].str.replace('million No', 'in millions')
-            df['Year'] = df['Year'].astype(str)
-            return df
+            with tracing.span('load_data') as span:
+                cache = get_disk_cache() if source is not None else None
+                store = dataset.load_store(iso3, cache=cache, fingerprint=source)
+                if span:
+                    span.rows = len(store.frame)
+            return store
         except Exception as e:
             st.error(f"Error loading data: {str(e)}")
-            return pd.DataFrame()
+            return IndicatorStore(pd.DataFrame(columns=['Iso3', 'Item', 'Element', 'Year', 'Unit', 'Value', 'Category']))
 
-def create_gauge_chart(value, title, min_val, max_val):
-    with st.spinner(f'Creating {title} gauge chart...'):
-        if isinstance(value, str) and 'k' in value:
-            numeric_value = float(value.replace('k', '')) * 1000
-        else:
-            numeric_value = float(value)
-            
-        fig = go.Figure(go.Indicator(
-            mode="gauge+number",
-            value=numeric_value,
-            title={'text': title},
-            domain={'x': [0, 1], 'y': [0, 1]},  # Full width and height of plot area
-            number={
-                'valueformat': ",.0f",
-                'suffix': "",
-                'font': {'size': 28},
-            },
-            gauge={
-                'axis': {
-                    'range': [min_val, max_val],
-                    'tickformat': ",.0f"
-                },
-                'bar': {'color': "#1f77b4"},
-                'steps': [
-                    {'range': [min_val, min_val + (max_val - min_val)*0.5], 'color': "lightgray"},
-                    {'range': [min_val + (max_val - min_val)*0.5, max_val], 'color': "gray"}],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': min_val + (max_val - min_val)*0.8}
-            }
-        ))
-        fig.update_layout(
-            height=300,
-            margin=dict(l=20, r=20, t=50, b=10),
-            autosize=True
-        )
-        return fig
+# One figure cache per process, shared by every session and backed by the disk cache
+@st.cache_resource
+def get_figure_cache():
+    from figure_cache import FigureCache
+    return FigureCache(disk=get_disk_cache())
 
+# Worker pool for building a rerun's figures concurrently, shared by every session
+@st.cache_resource
+def get_figure_pool(mode):
+    import charts
+    import dataset
+    if mode == 'thread':
+        return ThreadPoolExecutor(max_workers=charts.default_workers(), thread_name_prefix='figure')
+    if mode == 'process':
+        return ProcessPoolExecutor(
+            max_workers=charts.default_workers(),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=charts.init_worker,
+            initargs=(dataset.DEFAULT_ISO3, dataset.CSV_PATH, dataset.DATASET_DIR)
+        )
+    return None
 
-def create_chart(data, chart_type, x=None, y=None, names=None, values=None, title=None, color=None):
-    with st.spinner(f'Creating {chart_type} chart: {title or ""}'):
-        if chart_type == 'line':
-            fig = px.line(data, x=x, y=y, title=title, color=color)
-        elif chart_type == 'bar':
-            fig = px.bar(data, x=x, y=y, title=title, color=color)
-        elif chart_type == 'scatter':
-            fig = px.scatter(data, x=x, y=y, title=title, color=color, trendline="lowess")
-        elif chart_type == 'pie':
-            fig = px.pie(data, names=names, values=values, title=title)
-        elif chart_type == 'area':
-            fig = px.area(data, x=x, y=y, title=title, color=color)
-        elif chart_type == 'box':
-            fig = px.box(data, x=x, y=y, title=title, color=color)
-        elif chart_type == 'histogram':
-            fig = px.histogram(data, x=x, title=title, color=color)
+# Figures for the specs, in the same order; a failed build gives its exception instead
+def build_figures(store, specs):
+    import charts
+    import plotly.io as pio
+    cache = get_figure_cache()
+    results = [cache.get((spec, store.version), store.source) for spec in specs]
+    pending = [i for i, fig in enumerate(results) if fig is None]
+    pool = get_figure_pool(FIGURE_POOL) if len(pending) > 1 else None
+    
+    if pool is None:
+        for i in pending:
+            try:
+                results[i] = charts.build_figure(store, specs[i])
+            except Exception as e:
+                results[i] = e
+    else:
+        if isinstance(pool, ProcessPoolExecutor):
+            futures = [pool.submit(charts.build_figure_json, specs[i], store.version) for i in pending]
         else:
-            raise ValueError("Unsupported chart type")
-        
-        if x == 'Year' or (isinstance(x, list) and 'Year' in x):
-            fig.update_xaxes(type='category')
-        return fig
+            futures = [pool.submit(charts.build_figure, store, specs[i]) for i in pending]
+        for i, future in zip(pending, futures):
+            try:
+                result = future.result()
+                results[i] = pio.from_json(result) if isinstance(result, str) else result
+            except Exception as e:
+                results[i] = e
+    
+    for i in pending:
+        if not isinstance(results[i], Exception):
+            cache.put((specs[i], store.version), results[i], store.source)
+    return results
+
+def figure_name(fig):
+    if fig.layout.title.text:
+        return fig.layout.title.text
+    if fig.data and getattr(fig.data[0], 'title', None) and fig.data[0].title.text:
+        return fig.data[0].title.text
+    return type(fig.data[0]).__name__ if fig.data else 'figure'
 
-def show_dataset_info(df):
+# st.plotly_chart, timed together with the figure's serialized size when tracing is on
+def plot_chart(fig, use_container_width=True, target=st):
+    if not tracing.enabled():
+        target.plotly_chart(fig, use_container_width=use_container_width)
+        return
+    with tracing.span(f'plotly_chart: {figure_name(fig)}') as span:
+        span.payload_bytes = len(fig.to_json())
+        target.plotly_chart(fig, use_container_width=use_container_width)
+
+def show_dataset_info(store):
+    import exports
+    import pandas as pd
+    df = store.frame
     st.title("Dataset Information")
     
     st.markdown("""
@@ -153,15 +178,47 @@ def show_dataset_info(df):
     
     st.markdown("### Dataset Summary")
     
-    # Add download button
-    csv = df.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        label="Download dataset as CSV",
-        data=csv,
-        file_name='sri_lanka_food_security_indicators.csv',
-        mime='text/csv',
-        help="Click to download the full dataset in CSV format"
+    # Export options; files are only written on request, then cached per dataset version and filter
+    col1, col2, col3 = st.columns(3)
+    export_categories = col1.multiselect(
+        "Indicators to export",
+        list(df['Category'].cat.categories),
+        help="Leave empty to export every indicator"
     )
+    min_year, max_year = store.year_bounds()
+    export_years = col2.slider("Years to export", min_year, max_year, (min_year, max_year))
+    export_format = col3.selectbox("Format", list(exports.FORMATS))
+    
+    filters = dict(iso3=store.default_iso3, categories=export_categories or None, years=export_years)
+    # Without a usable export directory (read-only home, unsafe permissions) the
+    # export is built in memory for this download instead of shared on disk
+    try:
+        path = exports.cached_export(store.version, export_format, **filters)
+        shared = True
+    except OSError:
+        path, shared = None, False
+    data = None
+    if path is None and st.button("Prepare download", help="Build the export file for the selected options"):
+        with st.spinner('Preparing export...'):
+            try:
+                path = exports.get_export(store.version, export_format, **filters) if shared else None
+            except OSError:
+                path = None
+            if path is None:
+                data = exports.export_bytes(export_format, **filters)
+    
+    if path or data is not None:
+        mime, extension = exports.FORMATS[export_format]
+        if path:
+            with open(path, 'rb') as export_file:
+                data = export_file.read()
+        st.download_button(
+            label=f"Download dataset as {export_format}",
+            data=data,
+            file_name=f'sri_lanka_food_security_indicators{extension}',
+            mime=mime,
+            help=f"Click to download the selected data in {export_format} format"
+        )
     
     st.dataframe(df.head(10))
     
@@ -207,26 +264,100 @@ def show_student_info():
     </div>
     """, unsafe_allow_html=True)
 
-def show_dashboard(df):
-    # Display Sri Lanka flag with loading state
+# Hidden page, listed only when tracing is enabled (DASHBOARD_TRACE=1)
+def show_diagnostics():
+    import pandas as pd
+    st.title("Diagnostics")
+    st.markdown("Timed spans recorded by this server process, slowest p95 first.")
+    
+    st.markdown("### Span Summary")
+    st.dataframe(tracing.summary(), use_container_width=True)
+    
+    st.markdown("### Figure Cache")
+    st.json(get_figure_cache().stats())
+    
+    cache = get_disk_cache()
+    if cache is not None:
+        st.markdown("### Shared Disk Cache")
+        st.json(cache.stats())
+    
+    st.markdown("### Recent Spans")
+    st.dataframe(pd.DataFrame(tracing.records()[-200:]).iloc[::-1], use_container_width=True)
+    
+    col1, col2 = st.columns(2)
+    col1.download_button(
+        label="Export spans as JSON lines",
+        data=tracing.to_jsonl(),
+        file_name='dashboard_spans.jsonl',
+        mime='application/x-ndjson'
+    )
+    if col2.button("Clear recorded spans"):
+        tracing.clear()
+        st.rerun()
+
+# Lay out a section's columns, reserving a slot per figure, then fill the slots once
+# every figure has been built
+def show_section(store, section, years):
+    import charts
+    import client_years
+    st.write(section.heading)
+    columns = st.columns(len(section.columns))
+    slots, specs = [], []
+    for column, items in zip(columns, section.columns):
+        with column:
+            range_metrics = [item for item in items if isinstance(item, charts.RangeMetric)]
+            for item in items:
+                if isinstance(item, charts.Metric):
+                    st.metric(label=item.label, value=item.value, help=item.help)
+                elif isinstance(item, charts.RangeMetric):
+                    if not CLIENT_YEARS:
+                        st.metric(label=item.label, value=charts.metric_value(store, item, years), help=item.help)
+                    elif item is range_metrics[0]:
+                        # One browser-side panel for the column's range metrics
+                        client_years.show_year_panel(store, range_metrics)
+                else:
+                    slots.append(st.empty())
+                    specs.append(charts.with_year_slider(item) if CLIENT_YEARS else item)
+    
+    for slot, fig in zip(slots, build_figures(store, specs)):
+        if isinstance(fig, Exception):
+            slot.error(f"Could not build this chart: {fig}")
+        else:
+            plot_chart(fig, target=slot)
+
+def show_dashboard():
+    # Display Sri Lanka flag from the cached local asset; the page still renders without it
     with st.spinner('Loading dashboard...'):
-        flag = load_flag_image()
-        if flag:
-            flag_base64 = image_to_base64(flag)
-            
-            st.markdown(f"""
-            <div style="display: flex; justify-content: center; align-items: center; flex-direction: column; width: 100%;">
-                <img src="data:image/png;base64,{flag_base64}" 
-                     width="250" style="margin-bottom: 10px;">
-                <h1 style="text-align: center; margin: 0; padding: 0;">Sri Lanka Food Security Indicators</h1>
-            </div>
-            <hr style='margin: 20px 0; border: 0.5px solid #f0f2f6;'>
-            """, unsafe_allow_html=True)
-            
-            if not df.empty:
-                # Year range selector
+        flag_uri = load_flag_data_uri()
+        flag_img = f"""<img src="{flag_uri}" 
+                 width="250" style="margin-bottom: 10px;">""" if flag_uri else ""
+        
+        st.markdown(f"""
+        <div style="display: flex; justify-content: center; align-items: center; flex-direction: column; width: 100%;">
+            {flag_img}
+            <h1 style="text-align: center; margin: 0; padding: 0;">Sri Lanka Food Security Indicators</h1>
+        </div>
+        <hr style='margin: 20px 0; border: 0.5px solid #f0f2f6;'>
+        """, unsafe_allow_html=True)
+        
+        # The header is on screen before the data and plotting libraries load
+        import client_years
+        import downsample
+        import plotly.graph_objects as go
+        from charts import ANALYSIS_SECTIONS
+        store = load_data()
+        
+        if not store.empty:
+            # Year range selector
+            min_year, max_year = store.year_bounds()
+            if CLIENT_YEARS:
+                # Every chart carries all years; years are picked in the browser
+                year_range = None
+                st.caption(f"Showing {min_year}-{max_year}. A chart's range slider narrows only that "
+                           "chart and each panel has its own year selectors; charts marked "
+                           "\"All years\" always cover the full range.")
+            else:
                 st.markdown("### Select the required years")
-                min_year, max_year = int(df['Year'].min()), int(df['Year'].max())
                 year_range = st.slider(
                     "Year range selector",
                     min_year, 
@@ -234,200 +365,111 @@ def show_dashboard(df):
                     (min_year, max_year),
                     label_visibility="collapsed"
                 )
-                filtered_df = df[(df['Year'].astype(int) >= year_range[0]) & (df['Year'].astype(int) <= year_range[1])]
-                
-                st.subheader("Trend Analysis")
-                categories = st.multiselect(
-                    "Select Indicators (Max 3)", 
-                    filtered_df['Category'].unique(),
-                    default=None,
-                    max_selections=3
-                )
+            
+            st.subheader("Trend Analysis")
+            with tracing.span('year_filter') as span:
+                available_categories = store.categories(year_range)
+                if span:
+                    span.rows = len(available_categories)
+            categories = st.multiselect(
+                "Select Indicators (Max 3)", 
+                available_categories,
+                default=None,
+                max_selections=3
+            )
 
-                if categories:
-                    with st.spinner('Generating trend visualization...'):
-                        fig = go.Figure()
-                        for cat in categories:
-                            cat_df = filtered_df[filtered_df['Category'] == cat]
-                            fig.add_trace(go.Scatter(
-                                x=cat_df['Year'], 
-                                y=cat_df['Value'], 
-                                name=cat,
-                                mode='lines+markers'
-                            ))
-                        fig.update_layout(
-                            xaxis_title='Year', 
-                            yaxis_title='Value', 
-                            height=500
-                        )
-                        st.plotly_chart(fig, use_container_width=True)
+            if categories:
+                with st.spinner('Generating trend visualization...'):
+                    fig = go.Figure()
+                    for cat in categories:
+                        series = store.series(cat, year_range)
+                        fig.add_trace(go.Scatter(
+                            x=series.index, 
+                            y=series.values, 
+                            name=cat,
+                            mode='lines+markers'
+                        ))
+                    fig.update_layout(
+                        xaxis_title='Year', 
+                        yaxis_title='Value', 
+                        height=500
+                    )
+                    # WebGL and server-side decimation once the selection has many points
+                    downsample.reduce_figure(fig)
+                    if CLIENT_YEARS:
+                        # The latest values for every year range travel with the chart
+                        fig.update_xaxes(rangeslider_visible=True)
+                        client_years.show_year_panel(store, client_years.latest_metrics(categories), fig)
+                    else:
+                        plot_chart(fig, use_container_width=True)
                         
                         cols = st.columns(len(categories))
                         for idx, cat in enumerate(categories):
-                            latest = filtered_df[filtered_df['Category'] == cat].iloc[-1]
-                            cols[idx].metric(cat, f"{float(latest['Value']):.1f} {latest['Unit']}")
-                else:
-                    st.info("Select up to three indicators from the dropdown to visualize and analyze")
+                            latest = store.latest(cat, year_range)
+                            if latest:
+                                _, value, unit = latest
+                                cols[idx].metric(cat, f"{value:.1f} {unit}")
+                            else:
+                                cols[idx].metric(cat, "n/a")
+            else:
+                st.info("Select up to three indicators from the dropdown to visualize and analyze")
 
-                st.subheader("Additional Analysis")
-                tab1, tab2, tab3, tab4 = st.tabs(["Food Security", "Economic", "Health", "Progress Indicators"])
-                
-                with tab1:
-                    st.write("### Food Security Indicators")
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        data = filtered_df[filtered_df['Category'] == 'Undernourishment'].copy()
-                        st.plotly_chart(create_chart(data, 'line', x='Year', y='Value', 
-                                                   title="Undernourishment Over Time"), 
-                                      use_container_width=True)
-                        
-                        data = filtered_df[filtered_df['Category'].isin(['Male Food Insecurity', 'Female Food Insecurity'])].copy()
-                        st.plotly_chart(create_chart(data, 'area', x='Year', y='Value', color='Category',
-                                                   title="Food Insecurity by Gender"), 
-                                      use_container_width=True)
-                    
-                    with col2:
-                        data = filtered_df[filtered_df['Category'].isin(['Male Food Insecurity', 'Female Food Insecurity'])].copy()
-                        st.plotly_chart(create_chart(data, 'bar', x='Year', y='Value', color='Category',
-                                                   title="Gender Comparison by Year"), 
-                                      use_container_width=True)
-                        
-                        latest_data = data[data['Year'] == data['Year'].max()].copy()
-                        st.plotly_chart(create_chart(latest_data, 'pie', names='Category', values='Value',
-                                                   title="Latest Gender Distribution"), 
-                                      use_container_width=True)
-                
-                with tab2:
-                    st.write("### Economic Indicators")
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        data = filtered_df[filtered_df['Category'] == 'GDP per capita'].copy()
-                        st.plotly_chart(create_chart(data, 'line', x='Year', y='Value', 
-                                                   title="GDP per capita Over Time"), 
-                                      use_container_width=True)
-                        
-                        data.loc[:, 'Value'] = pd.to_numeric(data['Value'], errors='coerce')
-                        gdp_growth = data['Value'].pct_change().mean() * 100
-                        st.metric(
-                            label="Average Annual GDP Growth Rate",
-                            value=f"{gdp_growth:.2f}%",
-                            help="Calculated as the mean percentage change in GDP per capita across all years"
-                        )
-                        
-                        gdp_volatility = data['Value'].pct_change().std() * 100
-                        st.metric(
-                            label="GDP Growth Volatility",
-                            value=f"{gdp_volatility:.2f}%",
-                            help="Standard deviation of annual GDP growth rates"
-                        )
-                    
-                    with col2:
-                        data = filtered_df[filtered_df['Category'] == 'Political Stability'].copy()
-                        st.plotly_chart(create_chart(data, 'area', x='Year', y='Value',
-                                                   title="Political Stability Trends"), 
-                                      use_container_width=True)
-                        
-                        gdp = filtered_df[filtered_df['Category'] == 'GDP per capita'].copy()
-                        stability = filtered_df[filtered_df['Category'] == 'Political Stability'].copy()
-                        merged = pd.merge(gdp, stability, on='Year', suffixes=('_GDP', '_Stability'))
-                        fig = px.scatter(merged, x='Value_GDP', y='Value_Stability',
-                                       title="GDP vs Political Stability",
-                                       trendline="lowess")
-                        correlation = merged['Value_GDP'].corr(merged['Value_Stability'])
-                        fig.add_annotation(text=f"Correlation: {correlation:.2f}", 
-                                         xref="paper", yref="paper",
-                                         x=0.05, y=0.95, showarrow=False)
-                        st.plotly_chart(fig, use_container_width=True)
-                
-                with tab3:
-                    st.write("### Health Indicators")
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        data = filtered_df[filtered_df['Category'] == 'Obesity'].copy()
-                        st.plotly_chart(create_chart(data, 'line', x='Year', y='Value', 
-                                                   title="Obesity Trends"), 
-                                      use_container_width=True)
-                        
-                        obesity = filtered_df[filtered_df['Category'] == 'Obesity'].copy()
-                        birthweight = filtered_df[filtered_df['Category'] == 'Low Birthweight'].copy()
-                        merged = pd.merge(obesity, birthweight, on='Year')
-                        st.plotly_chart(create_chart(merged, 'scatter', 
-                                                   x='Value_x', y='Value_y',
-                                                   title="Obesity vs Birthweight"), 
-                                      use_container_width=True)
-                    
-                    with col2:
-                        data = filtered_df[filtered_df['Category'] == 'Low Birthweight'].copy()
-                        st.plotly_chart(create_chart(data, 'bar', x='Year', y='Value', 
-                                                   title="Low Birthweight by Year"), 
-                                      use_container_width=True)
-                        
-                        health_data = filtered_df[filtered_df['Category'].isin(['Obesity', 'Low Birthweight'])].copy()
-                        st.plotly_chart(create_chart(health_data, 'box', x='Category', y='Value',
-                                                   title="Health Indicators Distribution"), 
-                                      use_container_width=True)
-                
-                with tab4:
-                    st.write("### Progress Indicators")
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        latest_gdp = filtered_df[filtered_df['Category'] == 'GDP per capita'].iloc[-1]['Value']
-                        st.plotly_chart(create_gauge_chart(
-                            value=float(latest_gdp),
-                            title="GDP Progress",
-                            min_val=6000,
-                            max_val=15000
-                        ), use_container_width=True)
-                        
-                        indicators = ['Protein Supply', 'Basic Water Access', 'Political Stability']
-                        area_data = filtered_df[filtered_df['Category'].isin(indicators)].copy()
-                        st.plotly_chart(create_chart(area_data, 'area', x='Year', y='Value', color='Category',
-                                                   title="Composite Indicators"), 
-                                      use_container_width=True)
-                    
-                    with col2:
-                        water_data = filtered_df[filtered_df['Category'].isin(['Safe Water Access', 'Basic Water Access'])].copy()
-                        st.plotly_chart(create_chart(water_data, 'bar', x='Year', y='Value', color='Category',
-                                                   title="Water Access Comparison"), 
-                                      use_container_width=True)
-                        
-                        progress_data = filtered_df[filtered_df['Category'].isin(
-                            ['Protein Supply', 'Basic Water Access', 'Political Stability', 'GDP per capita'])].copy()
-                        pivot_data = progress_data.pivot(index='Year', columns='Category', values='Value').corr()
-                        fig = px.imshow(pivot_data, text_auto=True,
-                                      title="Indicator Correlations")
-                        st.plotly_chart(fig, use_container_width=True)
+            st.subheader("Additional Analysis")
+            if LAZY_SECTIONS:
+                # Only the selected section's figures are built and sent to the browser
+                section = st.radio(
+                    "Analysis section",
+                    list(ANALYSIS_SECTIONS),
+                    horizontal=True,
+                    key='analysis_section',
+                    label_visibility="collapsed"
+                )
+                show_section(store, ANALYSIS_SECTIONS[section](store, year_range), year_range)
+            else:
+                tabs = st.tabs(list(ANALYSIS_SECTIONS))
+                for tab, layout in zip(tabs, ANALYSIS_SECTIONS.values()):
+                    with tab:
+                        show_section(store, layout(store, year_range), year_range)
 
 def main():
-    # Load data once at the start
-    df = load_data()
-    
     # Sidebar navigation
     st.sidebar.title("Navigation")
+    pages = ["Dashboard", "Project Info", "Student Info", "Dataset Info"]
+    if tracing.enabled():
+        pages.append("Diagnostics")
     page = st.sidebar.radio(
         "Select a page",
-        ["Dashboard", "Project Info", "Student Info", "Dataset Info"],
+        pages,
+        key='page',
         label_visibility="visible"
     )
 
+    with tracing.span(f'rerun: {page}'):
+        show_page(page)
+
+    st.markdown("---")
+    st.caption("Developed for University of Westminster - Data Science Project Lifecycle")
+    
+    # Optionally load the data and build the default figures in the background once the
+    # first page is on screen (DASHBOARD_WARM_CACHES=1)
+    if startup.WARM_CACHES:
+        startup.start_cache_warmer(CLIENT_YEARS)
+
+def show_page(page):
     if page == "Dashboard":
-        show_dashboard(df)
+        show_dashboard()
     elif page == "Project Info":
         show_project_info()
     elif page == "Student Info":
         show_student_info()
     elif page == "Dataset Info":
-        if not df.empty:
-            show_dataset_info(df)
+        store = load_data()
+        if not store.empty:
+            show_dataset_info(store)
         else:
             st.error("Failed to load dataset")
-
-    st.markdown("---")
-    st.caption("Developed for University of Westminster - Data Science Project Lifecycle")
+    elif page == "Diagnostics":
+        show_diagnostics()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(ROOT, 'app.py')
+SOURCE_CSV = os.path.join(ROOT, 'suite-of-food-security-indicators_lka-cleaned.csv')
+PAGES = ["Project Info", "Student Info", "Dataset Info", "Dashboard"]
+
+# Milliseconds per scenario kind (the part of the scenario name before ':')
+DEFAULT_BUDGETS = {
+    'cold_load': 10000,
+    'warm_rerun': 1000,
+    'page': 2000,
+    'slider': 2000,
+    'multiselect': 2000,
+    # The first lowess trendline imports statsmodels
+    'section': 5000,
+}
+
+
+# Sri Lanka's rows copied to `countries` Iso3 codes, each indicator scaled by a random factor
+def synthetic_frame(countries, seed=0):
+    base = pd.read_csv(SOURCE_CSV)
+    values = pd.to_numeric(base['Value'].astype(str).str.lstrip('<'), errors='coerce')
+    letters = string.ascii_uppercase
+    codes = ['LKA'] + [a + b + c for a in letters for b in letters for c in letters if a + b + c != 'LKA']
+    rng = np.random.default_rng(seed)
+    items = base['Item'].unique()
+
+    frames = []
+    for iso3 in codes[:countries]:
+        factors = dict(zip(items, rng.uniform(0.5, 1.5, len(items)))) if iso3 != 'LKA' else dict.fromkeys(items, 1.0)
+        frame = base.copy()
+        frame['Iso3'] = iso3
+        frame['Value'] = (values * frame['Item'].map(factors)).round(3)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def prepare_inputs(name, countries, backend, workdir):
+    from dataset import read_csv, write_dataset
+
+    if name == 'lka':
+        csv_path = SOURCE_CSV
+    else:
+        csv_path = os.path.join(workdir, f'{name}.csv')
+        synthetic_frame(countries).to_csv(csv_path, index=False)
+
+    dataset_dir = os.path.join(workdir, f'{name}-dataset')
+    if backend == 'parquet':
+        write_dataset(read_csv(csv_path), dataset_dir)
+    return csv_path, dataset_dir
+
+
+# Runs inside the worker process: drive app.py headlessly and time each interaction
+def run_scenarios(memory=True):
+    from streamlit.testing.v1 import AppTest
+
+    results = []
+    app = AppTest.from_file(APP_PATH, default_timeout=600)
+
+    def step(name, action):
+        if memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        action()
+        elapsed = (time.perf_counter() - start) * 1000
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+        errors = [str(e.value) for e in app.exception]
+        results.append({
+            'scenario': name,
+            'ms': round(elapsed, 2),
+            'peak_bytes': peak,
+            'charts': len(app.get('plotly_chart')),
+            'errors': errors,
+        })
+
+    if memory:
+        tracemalloc.start()
+
+    step('cold_load', app.run)
+    step('warm_rerun', app.run)
+
+    for page in PAGES:
+        step(f'page:{page}', lambda: app.sidebar.radio[0].set_value(page).run())
+
+    # No year slider in client-side year mode (DASHBOARD_CLIENT_YEARS=1)
+    if app.slider:
+        slider = app.slider[0]
+        low, high = int(slider.min), int(slider.max)
+        middle = (low + high) // 2
+        for years in [(middle, high), (low, middle), (low, high), (middle, high)]:
+            step(f'slider:{years[0]}-{years[1]}', lambda: app.slider[0].set_value(years).run())
+
+    options = app.multiselect[0].options
+    for count in (1, 3, 0):
+        step(f'multiselect:{count}', lambda: app.multiselect[0].set_value(options[:count]).run())
+
+    sections = [radio for radio in app.radio if radio.key == 'analysis_section']
+    if sections:
+        for section in sections[0].options[1:] + sections[0].options[:1]:
+            step(f'section:{section}', lambda: app.radio(key='analysis_section').set_value(section).run())
+
+    return results
+
+
+def run_worker(name, csv_path, dataset_dir, memory):
+    # A fresh shared cache per dataset, so cold_load really is cold
+    cache_path = os.path.join(os.path.dirname(dataset_dir), f'{name}-cache.sqlite')
+    env = dict(os.environ, FOOD_SECURITY_CSV=csv_path, FOOD_SECURITY_DATASET=dataset_dir,
+               DASHBOARD_CACHE_PATH=cache_path,
+               PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    command = [sys.executable, os.path.abspath(__file__), '--worker']
+    if not memory:
+        command.append('--no-memory')
+    completed = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Benchmark worker for {name} failed:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def check_budgets(results, budgets):
+    failures = []
+    for result in results:
+        kind = result['scenario'].split(':')[0]
+        budget = budgets.get(result['scenario'], budgets.get(kind))
+        result['budget_ms'] = budget
+        result['ok'] = not result['errors'] and (budget is None or result['ms'] <= budget)
+        if not result['ok']:
+            failures.append(result)
+    return failures
+
+
+def print_report(dataset, results):
+    print(f"\n{dataset}")
+    print(f"{'scenario':<32}{'ms':>10}{'budget':>10}{'peak MiB':>10}{'charts':>8}  status")
+    for r in results:
+        peak = f"{r['peak_bytes'] / 2**20:.1f}" if r['peak_bytes'] is not None else '-'
+        status = 'ok' if r['ok'] else ('ERROR' if r['errors'] else 'OVER BUDGET')
+        print(f"{r['scenario']:<32}{r['ms']:>10.1f}{r['budget_ms'] or '-':>10}{peak:>10}{r['charts']:>8}  {status}")
+
+
+def parse_budgets(values, default_budget):
+    budgets = dict(DEFAULT_BUDGETS)
+    if default_budget is not None:
+        budgets = dict.fromkeys(budgets, default_budget)
+    for value in values or []:
+        name, _, ms = value.rpartition('=')
+        budgets[name] = float(ms)
+    return budgets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless rerun benchmarks for the dashboard")
+    parser.add_argument('--datasets', default='lka,synthetic',
+                        help="Comma separated: lka (the Sri Lanka CSV) and/or synthetic")
+    parser.add_argument('--countries', type=int, default=200, help="Countries in the synthetic dataset")
+    parser.add_argument('--backend', choices=['csv', 'parquet'], default='csv', help="Storage load_data reads from")
+    parser.add_argument('--budget', action='append', metavar='SCENARIO=MS',
+                        help="Latency budget for a scenario or scenario kind, e.g. slider=500")
+    parser.add_argument('--default-budget', type=float, default=None, help="Budget for every scenario kind")
+    parser.add_argument('--no-memory', action='store_true', help="Skip tracemalloc peak memory tracking")
+    parser.add_argument('--json', default=None, help="Write results as JSON lines to this file")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_scenarios(memory=not args.no_memory)))
+        return
+
+    budgets = parse_budgets(args.budget, args.default_budget)
+    failures = []
+    records = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.datasets.split(','):
+            csv_path, dataset_dir = prepare_inputs(name, args.countries, args.backend, workdir)
+            results = run_worker(name, csv_path, dataset_dir, not args.no_memory)
+            failures += check_budgets(results, budgets)
+            label = f"{name} ({args.backend}{'' if name == 'lka' else f', {args.countries} countries'})"
+            print_report(label, results)
+            records += [dict(r, dataset=name, backend=args.backend) for r in results]
+
+    if args.json:
+        with open(args.json, 'w') as out:
+            for record in records:
+                out.write(json.dumps(record) + "\n")
+
+    if failures:
+        print(f"\n{len(failures)} scenario(s) failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+import os
+from collections import namedtuple
+from contextlib import nullcontext
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import downsample
+import tracing
+
+
+# A figure described by plain, hashable, picklable values so it can key the
+# figure cache and be built on a worker thread or process
+FigureSpec = namedtuple('FigureSpec', ['kind', 'categories', 'years', 'options'])
+Metric = namedtuple('Metric', ['label', 'value', 'help'])
+# A statistic of one indicator over the selected years: 'latest', 'growth_mean' or 'growth_std'.
+# Resolved on the server per year range, or tabulated for every range in client-side year mode.
+RangeMetric = namedtuple('RangeMetric', ['label', 'category', 'stat', 'help'])
+Section = namedtuple('Section', ['heading', 'columns'])
+
+
+def figure_spec(kind, categories=(), years=None, **options):
+    return FigureSpec(kind, tuple(categories), tuple(years) if years is not None else None,
+                      tuple(sorted(options.items())))
+
+
+def format_metric(stat, value, unit=''):
+    if value is None or np.isnan(value):
+        return "n/a"
+    if stat == 'latest':
+        return f"{value:.1f} {unit}"
+    return f"{value * 100:.2f}%"
+
+
+def metric_value(store, metric, years):
+    # Countries without the indicator show "n/a", as the client-side panel does
+    if metric.category not in store.range_stats().columns:
+        return "n/a"
+    if metric.stat == 'latest':
+        latest = store.latest(metric.category, years)
+        return format_metric('latest', *latest[1:]) if latest else "n/a"
+    return format_metric(metric.stat, getattr(store.range_stats(), metric.stat)(metric.category, years))
+
+
+# st.spinner on the script thread; figure pool workers have no script context to draw into
+def chart_spinner(message):
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return nullcontext()
+    return st.spinner(message)
+
+
+def create_gauge_chart(value, title, min_val, max_val):
+    with chart_spinner(f'Creating {title} gauge chart...'), tracing.span(f'create_gauge_chart: {title}'):
+        if isinstance(value, str) and 'k' in value:
+            numeric_value = float(value.replace('k', '')) * 1000
+        else:
+            numeric_value = float(value)
+
+        fig = go.Figure(go.Indicator(
+            mode="gauge+number",
+            value=numeric_value,
+            title={'text': title},
+            domain={'x': [0, 1], 'y': [0, 1]},  # Full width and height of plot area
+            number={
+                'valueformat': ",.0f",
+                'suffix': "",
+                'font': {'size': 28},
+            },
+            gauge={
+                'axis': {
+                    'range': [min_val, max_val],
+                    'tickformat': ",.0f"
+                },
+                'bar': {'color': "#1f77b4"},
+                'steps': [
+                    {'range': [min_val, min_val + (max_val - min_val)*0.5], 'color': "lightgray"},
+                    {'range': [min_val + (max_val - min_val)*0.5, max_val], 'color': "gray"}],
+                'threshold': {
+                    'line': {'color': "red", 'width': 4},
+                    'thickness': 0.75,
+                    'value': min_val + (max_val - min_val)*0.8}
+            }
+        ))
+        fig.update_layout(
+            height=300,
+            margin=dict(l=20, r=20, t=50, b=10),
+            autosize=True
+        )
+        return fig
+
+
+def create_chart(data, chart_type, x=None, y=None, names=None, values=None, title=None, color=None):
+    with chart_spinner(f'Creating {chart_type} chart: {title or ""}'), \
+            tracing.span(f'create_chart: {chart_type} {title or ""}', rows=len(data)):
+        if chart_type == 'line':
+            fig = px.line(data, x=x, y=y, title=title, color=color)
+        elif chart_type == 'bar':
+            fig = px.bar(data, x=x, y=y, title=title, color=color)
+        elif chart_type == 'scatter':
+            fig = px.scatter(data, x=x, y=y, title=title, color=color, trendline="lowess")
+        elif chart_type == 'pie':
+            fig = px.pie(data, names=names, values=values, title=title)
+        elif chart_type == 'area':
+            fig = px.area(data, x=x, y=y, title=title, color=color)
+        elif chart_type == 'box':
+            fig = px.box(data, x=x, y=y, title=title, color=color)
+        elif chart_type == 'histogram':
+            fig = px.histogram(data, x=x, title=title, color=color)
+        else:
+            raise ValueError("Unsupported chart type")
+
+        if x == 'Year' or (isinstance(x, list) and 'Year' in x):
+            fig.update_xaxes(type='category')
+        return fig
+
+
+# create_chart over a store slice: 'long' rows, 'paired' columns, or the 'latest' year's rows
+def build_store_chart(store, categories, years, chart_type, rows='long', **spec):
+    with tracing.span('merge' if rows == 'paired' else 'year_filter') as span:
+        if rows == 'paired':
+            data = store.paired(categories, years)
+        else:
+            data = store.long(categories, years)
+            if rows == 'latest':
+                data = data[data['Year'] == data['Year'].max()]
+        if span:
+            span.rows = len(data)
+    return create_chart(data, chart_type, **spec)
+
+
+def build_correlation_scatter(store, categories, years, title):
+    x, y = categories
+    with tracing.span('merge') as span:
+        merged = store.paired(categories, years)
+        if span:
+            span.rows = len(merged)
+    with chart_spinner(f'Creating scatter chart: {title}'), \
+            tracing.span(f'create_chart: scatter {title}', rows=len(merged)):
+        fig = px.scatter(merged, x=x, y=y,
+                       title=title,
+                       trendline="lowess")
+    correlation = store.range_stats().corr(x, y, years)
+    fig.add_annotation(text=f"Correlation: {correlation:.2f}",
+                     xref="paper", yref="paper",
+                     x=0.05, y=0.95, showarrow=False)
+    return fig
+
+
+def build_gauge(store, categories, years, **spec):
+    return create_gauge_chart(**spec)
+
+
+def build_correlation_heatmap(store, categories, years, title):
+    with chart_spinner(f'Creating heatmap: {title}'), tracing.span(f'create_chart: imshow {title}'):
+        return px.imshow(store.range_stats().corr_matrix(categories, years),
+                         text_auto=True, title=title)
+
+
+FIGURE_BUILDERS = {
+    'chart': build_store_chart,
+    'correlation_scatter': build_correlation_scatter,
+    'gauge': build_gauge,
+    'correlation_heatmap': build_correlation_heatmap,
+}
+
+
+def build_figure(store, spec):
+    options = dict(spec.options)
+    year_slider = options.pop('year_slider', False)
+    fig = FIGURE_BUILDERS[spec.kind](store, list(spec.categories), spec.years, **options)
+    if year_slider and options.get('x') == 'Year':
+        fig.update_xaxes(rangeslider_visible=True)
+    elif year_slider:
+        # Nothing in the browser narrows the other charts, so they say which years they cover
+        first, last = store.year_bounds()
+        _add_subtitle(fig, f"All years, {first}-{last}")
+    return downsample.reduce_figure(fig)
+
+
+def _add_subtitle(fig, note):
+    indicators = [trace for trace in fig.data if trace.type == 'indicator']
+    if indicators and not fig.layout.title.text:
+        title = indicators[0].title.text or ''
+        indicators[0].title.text = f"{title}<br><sup>{note}</sup>"
+        return
+    title = fig.layout.title.text or ''
+    fig.update_layout(title_text=f"{title}<br><sup>{note}</sup>" if title else f"<sup>{note}</sup>")
+
+
+# The same figure sent for every year, with a range slider to pick years in the browser
+def with_year_slider(spec):
+    return spec._replace(options=tuple(sorted(dict(spec.options, year_slider=True).items())))
+
+
+def chart(categories, years, chart_type, **options):
+    return figure_spec('chart', categories, years, chart_type=chart_type, **options)
+
+
+def food_security_section(store, years):
+    gender = ['Male Food Insecurity', 'Female Food Insecurity']
+    return Section("### Food Security Indicators", [
+        [
+            chart(['Undernourishment'], years, 'line', x='Year', y='Value', title="Undernourishment Over Time"),
+            chart(gender, years, 'area', x='Year', y='Value', color='Category', title="Food Insecurity by Gender"),
+        ],
+        [
+            chart(gender, years, 'bar', x='Year', y='Value', color='Category', title="Gender Comparison by Year"),
+            chart(gender, years, 'pie', rows='latest', names='Category', values='Value',
+                  title="Latest Gender Distribution"),
+        ],
+    ])
+
+
+def economic_section(store, years):
+    return Section("### Economic Indicators", [
+        [
+            chart(['GDP per capita'], years, 'line', x='Year', y='Value', title="GDP per capita Over Time"),
+            RangeMetric("Average Annual GDP Growth Rate", 'GDP per capita', 'growth_mean',
+                        "Calculated as the mean percentage change in GDP per capita across all years"),
+            RangeMetric("GDP Growth Volatility", 'GDP per capita', 'growth_std',
+                        "Standard deviation of annual GDP growth rates"),
+        ],
+        [
+            chart(['Political Stability'], years, 'area', x='Year', y='Value', title="Political Stability Trends"),
+            figure_spec('correlation_scatter', ['GDP per capita', 'Political Stability'], years,
+                        title="GDP vs Political Stability"),
+        ],
+    ])
+
+
+def health_section(store, years):
+    return Section("### Health Indicators", [
+        [
+            chart(['Obesity'], years, 'line', x='Year', y='Value', title="Obesity Trends"),
+            chart(['Obesity', 'Low Birthweight'], years, 'scatter', rows='paired',
+                  x='Obesity', y='Low Birthweight', title="Obesity vs Birthweight"),
+        ],
+        [
+            chart(['Low Birthweight'], years, 'bar', x='Year', y='Value', title="Low Birthweight by Year"),
+            chart(['Obesity', 'Low Birthweight'], years, 'box', x='Category', y='Value',
+                  title="Health Indicators Distribution"),
+        ],
+    ])
+
+
+def progress_section(store, years):
+    latest_gdp = store.latest('GDP per capita', years)
+    gdp_value = latest_gdp[1] if latest_gdp else 0
+    progress = ['Protein Supply', 'Basic Water Access', 'Political Stability', 'GDP per capita']
+    return Section("### Progress Indicators", [
+        [
+            figure_spec('gauge', value=gdp_value, title="GDP Progress", min_val=6000, max_val=15000),
+            chart(['Protein Supply', 'Basic Water Access', 'Political Stability'], years, 'area',
+                  x='Year', y='Value', color='Category', title="Composite Indicators"),
+        ],
+        [
+            chart(['Safe Water Access', 'Basic Water Access'], years, 'bar', x='Year', y='Value',
+                  color='Category', title="Water Access Comparison"),
+            figure_spec('correlation_heatmap', progress, years, title="Indicator Correlations"),
+        ],
+    ])
+
+
+ANALYSIS_SECTIONS = {
+    "Food Security": food_security_section,
+    "Economic": economic_section,
+    "Health": health_section,
+    "Progress Indicators": progress_section,
+}
+
+
+# Figure pool process state: each worker loads the store once and reuses it
+_worker_store = None
+_worker_source = None
+
+
+def init_worker(iso3, csv_path, dataset_dir):
+    global _worker_store, _worker_source
+    from dataset import load_store
+    from disk_cache import default_cache
+    _worker_source = (iso3, csv_path, dataset_dir)
+    _worker_store = load_store(iso3, dataset_dir, csv_path, cache=default_cache())
+
+
+# Process pool entry point: returns the figure as JSON, which pickles cheaply.
+# Reloads once if the data changed on disk since the worker started.
+def build_figure_json(spec, version):
+    if _worker_store.version != version:
+        init_worker(*_worker_source)
+    if _worker_store.version != version:
+        raise RuntimeError("Figure worker data does not match the dashboard's dataset version")
+    return build_figure(_worker_store, spec).to_json()
+
+
+def default_workers():
+    return min(8, os.cpu_count() or 1)
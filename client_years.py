@@ -0,0 +1,161 @@
+import json
+import os
+from string import Template
+
+import numpy as np
+import streamlit.components.v1 as components
+
+import charts
+import tracing
+
+
+# Where the panel loads plotly.js from: 'cdn', or the URL of a self-hosted plotly.min.js
+PLOTLY_JS = os.environ.get('DASHBOARD_PLOTLY_JS', 'cdn')
+FIGURE_ID = 'year-panel-figure'
+
+
+def _json_values(values):
+    return [None if np.isnan(v) else round(float(v), 8) for v in values]
+
+
+# Everything the browser needs to evaluate a metric for any year range without asking the
+# server: the latest observation for each last year, or the upper triangle of the
+# [first year][last year - first year] table for growth statistics
+def metric_table(store, metric, iso3=None):
+    stats = store.range_stats(iso3)
+    entry = {'label': metric.label, 'stat': metric.stat, 'help': metric.help or ''}
+    if metric.category not in stats.columns:
+        return dict(entry, stat='missing')
+    if metric.stat == 'latest':
+        return dict(entry,
+                    unit=store.units.get(metric.category, ''),
+                    latest=stats.last_observed(metric.category).tolist(),
+                    values=_json_values(store.window(None, iso3)[metric.category].to_numpy()))
+    mean, std = stats.growth_tables(metric.category)
+    table = mean if metric.stat == 'growth_mean' else std
+    return dict(entry, table=[_json_values(table[lo, lo:]) for lo in range(stats.n_rows)])
+
+
+def panel_payload(store, metrics, iso3=None):
+    first, last = store.year_bounds()
+    return {
+        'years': list(range(first, last + 1)),
+        'metrics': [metric_table(store, metric, iso3) for metric in metrics],
+    }
+
+
+PANEL_TEMPLATE = Template("""
+<style>
+    body { margin: 0; font-family: "Source Sans Pro", sans-serif; color: #FAFAFA; background: transparent; }
+    .years { display: flex; gap: 12px; align-items: center; margin-bottom: 8px; font-size: 14px; }
+    .years select { background: #262730; color: #FAFAFA; border: 1px solid #4B4D57; border-radius: 4px; padding: 4px 8px; }
+    .metrics { display: flex; flex-wrap: wrap; gap: 24px; margin-top: 8px; }
+    .metric-label { font-size: 14px; color: #A3A8B8; }
+    .metric-value { font-size: 32px; }
+</style>
+<div class="years">
+    <label>From <select id="year-from"></select></label>
+    <label>To <select id="year-to"></select></label>
+</div>
+$figure
+<div class="metrics">$metrics</div>
+<script>
+(function () {
+    var data = $data;
+    var years = data.years;
+    var last = years.length - 1;
+    var from = document.getElementById('year-from');
+    var to = document.getElementById('year-to');
+    var chart = document.getElementById('$figure_id');
+    years.forEach(function (year, i) {
+        from.add(new Option(year, i));
+        to.add(new Option(year, i));
+    });
+
+    function value(metric, lo, hi) {
+        if (metric.stat === 'latest') {
+            var row = metric.latest[hi];
+            return row >= lo ? metric.values[row] : null;
+        }
+        return metric.table ? metric.table[lo][hi - lo] : null;
+    }
+
+    function format(metric, v) {
+        if (v === null || v === undefined) return 'n/a';
+        if (metric.stat === 'latest') return v.toFixed(1) + ' ' + metric.unit;
+        return (v * 100).toFixed(2) + '%';
+    }
+
+    function select(lo, hi, fromChart) {
+        lo = Math.min(Math.max(lo, 0), last);
+        hi = Math.min(Math.max(hi, lo), last);
+        from.value = lo;
+        to.value = hi;
+        data.metrics.forEach(function (metric, i) {
+            document.getElementById('metric-' + i).textContent = format(metric, value(metric, lo, hi));
+        });
+        if (chart && !fromChart) {
+            Plotly.relayout(chart, {'xaxis.range': [years[lo] - 0.5, years[hi] + 0.5]});
+        }
+    }
+
+    from.onchange = function () { select(+from.value, Math.max(+to.value, +from.value)); };
+    to.onchange = function () { select(Math.min(+from.value, +to.value), +to.value); };
+
+    // Zooming or dragging the chart's range slider moves the year selection with it
+    if (chart && chart.on) {
+        chart.on('plotly_relayout', function (event) {
+            if (event['xaxis.autorange']) return select(0, last, true);
+            var range = event['xaxis.range'];
+            if (!range && event['xaxis.range[0]'] !== undefined) {
+                range = [event['xaxis.range[0]'], event['xaxis.range[1]']];
+            }
+            if (range) select(Math.ceil(range[0] - years[0]), Math.floor(range[1] - years[0]), true);
+        });
+    }
+    select(0, last, true);
+})();
+</script>
+""")
+
+METRIC_TEMPLATE = Template("""
+<div title="$help"><div class="metric-label">$label</div><div class="metric-value" id="metric-$index"></div></div>
+""")
+
+
+def _escape(text):
+    return (str(text).replace('&', '&amp;').replace('<', '&lt;')
+            .replace('>', '&gt;').replace('"', '&quot;'))
+
+
+def panel_html(store, metrics, fig=None, iso3=None):
+    figure = ''
+    if fig is not None:
+        fig = fig.update_layout(template='plotly_dark', paper_bgcolor='rgba(0,0,0,0)',
+                                plot_bgcolor='rgba(0,0,0,0)')
+        figure = fig.to_html(full_html=False, include_plotlyjs=PLOTLY_JS, div_id=FIGURE_ID,
+                             config={'responsive': True})
+    return PANEL_TEMPLATE.substitute(
+        figure=figure,
+        figure_id=FIGURE_ID,
+        metrics=''.join(METRIC_TEMPLATE.substitute(index=i, label=_escape(m.label), help=_escape(m.help or ''))
+                        for i, m in enumerate(metrics)),
+        data=json.dumps(panel_payload(store, metrics, iso3), separators=(',', ':')).replace('</', '<\\/'),
+    )
+
+
+def show_year_panel(store, metrics, fig=None, iso3=None):
+    """Render year selectors, an optional figure and metrics as one self-contained
+    HTML block. Every year range is answered in the browser from tables shipped
+    with the page, so changing years never reruns the script."""
+    with tracing.span('year_panel') as span:
+        html = panel_html(store, metrics, fig, iso3)
+        figure_height = (fig.layout.height or 450) if fig is not None else 0
+        height = 60 + figure_height + 90 * (1 + (len(metrics) - 1) // 4)
+        components.html(html, height=height)
+        if span:
+            span.payload_bytes = len(html)
+
+
+def latest_metrics(categories):
+    return [charts.RangeMetric(category, category, 'latest', None) for category in categories]
@@ -0,0 +1,209 @@
+import argparse
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+from disk_cache import file_fingerprint
+from indicator_store import IndicatorStore
+
+
+# Overridable for benchmarks and deployments that keep the data elsewhere
+CSV_PATH = os.environ.get('FOOD_SECURITY_CSV', 'suite-of-food-security-indicators_lka-cleaned.csv')
+DATASET_DIR = os.environ.get('FOOD_SECURITY_DATASET', os.path.join('data', 'food-security-indicators'))
+PARTITION_COLUMNS = ['Iso3', 'Category']
+DEFAULT_ISO3 = 'LKA'
+# Written after a successful build; Arrow skips files starting with '_' during discovery
+BUILD_MARKER = '_BUILT'
+# Recorded in the build marker; datasets written in another layout are rebuilt, not read
+DATASET_FORMAT = 2
+
+# Short display names for the FAOSTAT items used across the dashboard
+CATEGORIES = {
+    'Average protein supply': 'Protein Supply',
+    'Gross domestic product per capita, PPP,': 'GDP per capita',
+    'Number of people undernourished': 'Undernourishment',
+    'Prevalence of severe food insecurity in the male adult population': 'Male Food Insecurity',
+    'Prevalence of severe food insecurity in the female adult population': 'Female Food Insecurity',
+    'Number of severely food insecure people': 'Severe Food Insecurity count',
+    'Political stability and absence of violence/terrorism': 'Political Stability',
+    'Percentage of population using safely managed drinking water services': 'Safe Water Access',
+    'Percentage of population using at least basic drinking water services': 'Basic Water Access',
+    'Number of obese adults': 'Obesity',
+    'Prevalence of low birthweight': 'Low Birthweight',
+    'Number of newborns with low birthweight': 'Low Birthweight Count'
+}
+
+SCHEMA = pa.schema([
+    ('Seq', pa.int32()),
+    ('Item', pa.string()),
+    ('Element', pa.string()),
+    ('Year', pa.int16()),
+    ('Unit', pa.string()),
+    # Kept as the source text, so censored entries such as "<0.1" survive a round trip
+    ('Value', pa.string()),
+    ('Iso3', pa.string()),
+    ('Category', pa.string()),
+])
+
+
+# Add the Category column and normalise units on a cleaned FAOSTAT frame.
+# Output from ingest.py already has both, so it is returned untouched.
+def prepare_frame(df):
+    if 'Category' in df.columns:
+        return df
+    df = df.copy()
+    df['Category'] = df['Item'].str.split('(').str[0].str.strip().replace(CATEGORIES)
+    df['Unit'] = df['Unit'].str.replace('million No', 'in millions')
+    return df
+
+
+def read_csv(path=CSV_PATH):
+    return prepare_frame(pd.read_csv(path, dtype={'Value': str}))
+
+
+# Write the prepared frame as a Parquet dataset partitioned by Iso3 and Category.
+# Seq keeps the original row order, which partition discovery would otherwise lose.
+# The dataset is built next to `path` and swapped in, so partitions for countries or
+# indicators that are no longer in the data do not survive a rebuild.
+def write_dataset(df, path=DATASET_DIR):
+    frame = pd.DataFrame({
+        'Seq': range(len(df)),
+        'Item': df['Item'].astype(str),
+        'Element': df['Element'].astype(str),
+        'Year': df['Year'].astype('int16'),
+        'Unit': df['Unit'].astype(str),
+        'Value': df['Value'].astype('string'),
+        'Iso3': df['Iso3'].astype(str),
+        'Category': df['Category'].astype(str),
+    })
+    table = pa.Table.from_pandas(frame, schema=SCHEMA, preserve_index=False)
+    path = os.path.normpath(path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    old_path = f"{path}.{os.getpid()}.old"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    ds.write_dataset(
+        table, tmp_path, format='parquet',
+        partitioning=PARTITION_COLUMNS, partitioning_flavor='hive',
+    )
+    with open(os.path.join(tmp_path, BUILD_MARKER), 'w') as marker:
+        marker.write(f"{DATASET_FORMAT} {len(frame)}\n")
+    # Readers that find no dataset during the swap fall back to the CSV
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+# Open the dataset with memory-mapped reads; returns None when it has not been built
+def open_dataset(path=DATASET_DIR):
+    if not os.path.isdir(path):
+        return None
+    filesystem = pafs.LocalFileSystem(use_mmap=True)
+    return ds.dataset(path, format='parquet', partitioning='hive',
+                      schema=SCHEMA, filesystem=filesystem)
+
+
+# Treat the dataset as stale when the CSV it was built from is newer, or when it
+# was written in an older layout
+def dataset_is_current(path=DATASET_DIR, csv_path=CSV_PATH):
+    marker = os.path.join(path, BUILD_MARKER)
+    try:
+        with open(marker) as f:
+            if f.read().split()[:1] != [str(DATASET_FORMAT)]:
+                return False
+    except OSError:
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    return os.path.getmtime(marker) >= os.path.getmtime(csv_path)
+
+
+def _as_list(value):
+    if value is None or isinstance(value, (list, tuple, set)):
+        return value
+    return [value]
+
+
+def build_filter(iso3=None, categories=None, years=None):
+    parts = []
+    if iso3 is not None:
+        parts.append(ds.field('Iso3').isin(_as_list(iso3)))
+    if categories is not None:
+        parts.append(ds.field('Category').isin(_as_list(categories)))
+    if years is not None:
+        parts.append((ds.field('Year') >= int(years[0])) & (ds.field('Year') <= int(years[1])))
+    expression = None
+    for part in parts:
+        expression = part if expression is None else expression & part
+    return expression
+
+
+def _filter_frame(df, iso3=None, categories=None, years=None):
+    mask = pd.Series(True, index=df.index)
+    if iso3 is not None:
+        mask &= df['Iso3'].isin(_as_list(iso3))
+    if categories is not None:
+        mask &= df['Category'].isin(_as_list(categories))
+    if years is not None:
+        mask &= df['Year'].between(int(years[0]), int(years[1]))
+    return df[mask].reset_index(drop=True)
+
+
+# Materialise only the requested slice. Partition and row-group statistics let
+# Arrow skip whole files for other countries, indicators and years; the CSV is
+# read instead when the dataset is missing or older than it.
+def read_frame(iso3=None, categories=None, years=None, path=DATASET_DIR, csv_path=CSV_PATH):
+    dataset = open_dataset(path) if dataset_is_current(path, csv_path) else None
+    if dataset is None:
+        return _filter_frame(read_csv(csv_path), iso3, categories, years)
+
+    table = dataset.to_table(filter=build_filter(iso3, categories, years))
+    df = table.to_pandas().sort_values('Seq', kind='stable')
+    columns = ['Iso3', 'Item', 'Element', 'Year', 'Unit', 'Value', 'Category']
+    return df[columns].reset_index(drop=True)
+
+
+# Fingerprint of what read_frame reads: the CSV, plus the dataset's build marker when the
+# dataset is current, since rebuilding it rewrites the marker
+def source_fingerprint(path=DATASET_DIR, csv_path=CSV_PATH):
+    marker = os.path.join(path, BUILD_MARKER)
+    if not os.path.exists(csv_path):
+        return file_fingerprint(marker)
+    fingerprint = file_fingerprint(csv_path)
+    if dataset_is_current(path, csv_path):
+        fingerprint = fingerprint._replace(sha256=f"{fingerprint.sha256}+{os.stat(marker).st_mtime_ns}")
+    return fingerprint
+
+
+# IndicatorStore for a country, taken from the shared disk cache when one is given.
+# Entries are keyed by the source fingerprint, so a changed CSV is re-read.
+def load_store(iso3=DEFAULT_ISO3, path=DATASET_DIR, csv_path=CSV_PATH, cache=None, fingerprint=None):
+    def build():
+        return IndicatorStore(read_frame(iso3=iso3, path=path, csv_path=csv_path))
+
+    if cache is None:
+        return build()
+    fingerprint = fingerprint or source_fingerprint(path, csv_path)
+    store = cache.get_or_build('store', iso3, build, fingerprint)
+    # Anything cached from the store is tagged with it, so a new data drop purges that too
+    store.source = fingerprint
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the partitioned Parquet dataset from the cleaned CSV")
+    parser.add_argument('--csv', default=CSV_PATH, help="Cleaned CSV to convert")
+    parser.add_argument('--out', default=DATASET_DIR, help="Output dataset directory")
+    args = parser.parse_args()
+
+    df = read_csv(args.csv)
+    write_dataset(df, args.out)
+    print(f"Wrote {len(df)} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
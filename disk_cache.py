@@ -0,0 +1,211 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+
+# Per-user directory for the cache and for exports; entries are unpickled, so it must
+# not be somewhere another local user can write
+CACHE_DIR = os.environ.get('DASHBOARD_CACHE_DIR') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache')),
+    'food-security-dashboard')
+CACHE_PATH = os.environ.get('DASHBOARD_CACHE_PATH', os.path.join(CACHE_DIR, 'cache.sqlite'))
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+# Last-use times are only rewritten when older than this, so hits stay read-only
+TOUCH_INTERVAL = 60
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Identity of a source file: its path, modification time, size and content hash
+Fingerprint = namedtuple('Fingerprint', ['path', 'mtime_ns', 'size', 'sha256'])
+
+_hashes = {}
+_hashes_lock = threading.Lock()
+
+
+def _check_private(path):
+    if os.name != 'posix':
+        return
+    stat = os.stat(path)
+    if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+        raise PermissionError(f"{path} must be owned by the current user and not writable by others")
+
+
+def private_dir(path):
+    """Create a directory only the current user can use, or check an existing one.
+
+    Raises PermissionError when the directory belongs to another user or
+    others can write to it, since anything planted there would be unpickled
+    by the cache or served as an export.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    _check_private(path)
+    return path
+
+
+def file_fingerprint(path):
+    """Fingerprint a file, hashing its content only when its stat has changed.
+
+    The hash is remembered per (path, mtime, size) for the life of the process,
+    so checking an unchanged file on every rerun costs one stat call.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _hashes_lock:
+        digest = _hashes.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                sha.update(block)
+        digest = sha.hexdigest()
+        with _hashes_lock:
+            _hashes[key] = digest
+    return Fingerprint(path, stat.st_mtime_ns, stat.st_size, digest)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    source TEXT,
+    fingerprint TEXT,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL,
+    value BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE INDEX IF NOT EXISTS entries_source ON entries (source);
+"""
+
+
+class DiskCache:
+    """Key/value cache in a SQLite file shared by every process on the host.
+
+    Entries built from a source file carry its fingerprint. Storing an entry
+    for a new fingerprint of a source deletes every entry built from older
+    versions of it, and lookups only match the current fingerprint, so a new
+    data drop is picked up without a restart. Once the stored values exceed
+    max_bytes, the least recently used entries are evicted.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        private_dir(os.path.dirname(os.path.abspath(path)))
+        # Created before SQLite opens it, so the database and its WAL files are 0600
+        os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))
+        _check_private(path)
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    # One connection per thread; WAL lets readers in other processes proceed during writes
+    def _connect(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    @staticmethod
+    def _key(namespace, key, fingerprint):
+        return hashlib.sha1(repr((namespace, key, fingerprint)).encode()).hexdigest()
+
+    @staticmethod
+    def _fingerprint_text(fingerprint):
+        if fingerprint is None:
+            return None
+        return f"{fingerprint.mtime_ns}:{fingerprint.size}:{fingerprint.sha256}"
+
+    def get(self, namespace, key, fingerprint=None):
+        row_key = self._key(namespace, key, self._fingerprint_text(fingerprint))
+        db = self._connect()
+        row = db.execute('SELECT value, accessed FROM entries WHERE key = ?', (row_key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        now = time.time()
+        if now - row[1] > TOUCH_INTERVAL:
+            with db:
+                db.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, row_key))
+        return row[0]
+
+    def put(self, namespace, key, value, fingerprint=None):
+        text = self._fingerprint_text(fingerprint)
+        source = fingerprint.path if fingerprint is not None else None
+        db = self._connect()
+        with db:
+            db.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)',
+                       (self._key(namespace, key, text), namespace, source, text,
+                        len(value), time.time(), value))
+            if source is not None:
+                db.execute('DELETE FROM entries WHERE source = ? AND fingerprint != ?', (source, text))
+        self.evict()
+        return value
+
+    # Pickled value for key, calling build() and storing its result only on a miss
+    def get_or_build(self, namespace, key, build, fingerprint=None):
+        payload = self.get(namespace, key, fingerprint)
+        if payload is not None:
+            try:
+                return pickle.loads(payload)
+            except Exception:
+                # Written by an incompatible version of the code; rebuild it
+                pass
+        value = build()
+        self.put(namespace, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), fingerprint)
+        return value
+
+    def evict(self, max_bytes=None):
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        db = self._connect()
+        total = db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= max_bytes:
+            return 0
+        evicted = []
+        for key, size in db.execute('SELECT key, size FROM entries ORDER BY accessed'):
+            if total <= max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        with db:
+            db.executemany('DELETE FROM entries WHERE key = ?', evicted)
+        return len(evicted)
+
+    def clear(self):
+        db = self._connect()
+        with db:
+            db.execute('DELETE FROM entries')
+
+    def stats(self):
+        db = self._connect()
+        rows = db.execute('SELECT namespace, COUNT(*), SUM(size) FROM entries GROUP BY namespace').fetchall()
+        lookups = self.hits + self.misses
+        return {
+            'path': self.path,
+            'namespaces': {namespace: {'entries': count, 'bytes': size} for namespace, count, size in rows},
+            'bytes': sum(size for _, _, size in rows),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+# The shared cache at CACHE_PATH, or None when it is disabled (empty path) or unusable
+def default_cache():
+    if not CACHE_PATH:
+        return None
+    try:
+        return DiskCache(CACHE_PATH)
+    except (OSError, sqlite3.Error):
+        return None
@@ -0,0 +1,170 @@
+import numpy as np
+import plotly.graph_objects as go
+
+
+# Above this many points a figure's line and marker traces are drawn with WebGL
+GL_THRESHOLD = 1_000
+# Points kept per figure once traces are decimated, shared across its traces
+MAX_FIGURE_POINTS = 10_000
+# Serialized figure size the decimation budget is shrunk to fit
+MAX_FIGURE_BYTES = 2 * 1024 * 1024
+
+
+def lttb(x, y, n_out):
+    """Indices of the points Largest-Triangle-Three-Buckets keeps.
+
+    The first and last points are always kept; every bucket in between keeps
+    the point forming the largest triangle with the previously kept point and
+    the average of the next bucket, which follows the visual shape of a line.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype('int64')
+    keep = np.empty(n_out, dtype='int64')
+    keep[0], keep[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[stop:next_stop].mean()
+        next_y = y[stop:next_stop].mean()
+        area = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        keep[bucket + 1] = previous
+    return keep
+
+
+# Indices of the lowest and highest point in each of n_out / 2 equal buckets, keeping
+# every spike; suits filled areas and noisy series
+def minmax(x, y, n_out):
+    n = len(x)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+    bucket = np.arange(n) * (n_out // 2) // n
+    order = np.lexsort((y, bucket))
+    sorted_buckets = bucket[order]
+    first = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+    last = np.r_[first[1:] - 1, n - 1]
+    return np.unique(np.r_[order[first], order[last], 0, n - 1])
+
+
+DECIMATORS = {'LTTB': lttb, 'min-max': minmax}
+
+
+def _points(trace):
+    return len(trace.y) if trace.y is not None else 0
+
+
+def _numeric(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype('datetime64[ns]').astype('int64')
+    return values.astype('float64') if np.issubdtype(values.dtype, np.number) else None
+
+
+def _line_traces(fig):
+    return [t for t in fig.data if t.type in ('scatter', 'scattergl') and t.y is not None]
+
+
+# Which indices to keep for a trace, or None when it should not be decimated.
+# Unordered x (scatter plots of one indicator against another) has no line to follow.
+def _decimated_indices(trace, n_out, method):
+    y = _numeric(trace.y)
+    x = _numeric(trace.x) if trace.x is not None else np.arange(len(trace.y), dtype='float64')
+    if x is None:
+        x = np.arange(len(trace.y), dtype='float64')
+    if y is None or len(x) != len(y) or np.any(np.diff(x) < 0):
+        return None
+    finite = np.flatnonzero(np.isfinite(y))
+    return finite[DECIMATORS[method](x[finite], y[finite], n_out)]
+
+
+def _take(trace, indices):
+    update = {}
+    for name in ('x', 'y', 'customdata', 'text', 'hovertext'):
+        values = getattr(trace, name)
+        if values is not None and not isinstance(values, str) and len(values) == len(trace.y):
+            update[name] = np.asarray(values)[indices]
+    trace.update(update)
+
+
+# Swap SVG scatter traces for Scattergl; returns how many were swapped
+def _to_webgl(fig):
+    converted = []
+    for trace in fig.data:
+        # WebGL has no stacked areas, so those stay SVG
+        if trace.type == 'scatter' and not trace.stackgroup:
+            props = trace.to_plotly_json()
+            props.pop('type', None)
+            converted.append(go.Scattergl(props, skip_invalid=True))
+        else:
+            converted.append(trace)
+    # Plotly only accepts a reordering of the figure's own traces on fig.data
+    fig.data = []
+    fig.add_traces(converted)
+    return sum(trace.type == 'scattergl' for trace in converted)
+
+
+def _decimate(fig, max_points):
+    traces = _line_traces(fig)
+    total = sum(_points(t) for t in traces)
+    if total <= max_points:
+        return None
+    methods = set()
+    # Stacked traces must keep the same x values to stack, so they share one index set
+    groups = {}
+    for trace in traces:
+        stackgroup = getattr(trace, 'stackgroup', None)
+        key = ('stack', stackgroup) if stackgroup else ('trace', id(trace))
+        groups.setdefault(key, []).append(trace)
+    for (kind, _), group in groups.items():
+        share = max(int(max_points * sum(_points(t) for t in group) / total), 3)
+        method = 'min-max' if kind == 'stack' or (group[0].fill or 'none') != 'none' else 'LTTB'
+        if kind == 'stack':
+            if any(list(t.x) != list(group[0].x) for t in group[1:]):
+                continue
+            total_y = np.sum([_numeric(t.y) for t in group], axis=0)
+            indices = _decimated_indices(go.Scatter(x=group[0].x, y=total_y), share // len(group), method)
+        else:
+            indices = _decimated_indices(group[0], share, method)
+        if indices is None:
+            continue
+        for trace in group:
+            _take(trace, indices)
+        methods.add(method)
+    return methods
+
+
+def _report(fig, note):
+    title = fig.layout.title.text or ''
+    fig.update_layout(title_text=f"{title}<br><sup>{note}</sup>" if title else f"<sup>{note}</sup>")
+
+
+def reduce_figure(fig, gl_threshold=GL_THRESHOLD, max_points=MAX_FIGURE_POINTS, max_bytes=MAX_FIGURE_BYTES):
+    """Keep a figure with many points cheap to ship and draw.
+
+    Above gl_threshold points, line and marker traces switch to Scattergl.
+    Above max_points, ordered traces are decimated server-side (LTTB for lines,
+    min-max for filled areas) within a per-figure point budget, which is then
+    halved until the serialized figure fits in max_bytes. The strategy used is
+    noted under the chart title. Small figures are returned untouched.
+    """
+    traces = _line_traces(fig)
+    total = sum(_points(t) for t in traces)
+    if total <= gl_threshold:
+        return fig
+
+    notes = ['WebGL'] if _to_webgl(fig) else []
+    budget = max_points
+    methods = _decimate(fig, budget)
+    while methods is not None and len(fig.to_json()) > max_bytes and budget > 100:
+        budget //= 2
+        methods = _decimate(fig, budget) or methods
+    shown = sum(_points(t) for t in _line_traces(fig))
+    if methods:
+        notes.append(f"{'/'.join(sorted(methods))} {shown:,} of {total:,} points")
+    if notes:
+        _report(fig, ', '.join(notes))
+    return fig
@@ -0,0 +1,150 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import dataset
+import disk_cache
+
+
+EXPORT_DIR = os.environ.get('DASHBOARD_EXPORT_DIR', os.path.join(disk_cache.CACHE_DIR, 'exports'))
+MAX_EXPORT_BYTES = 512 * 1024 * 1024
+CHUNK_ROWS = 50_000
+# Part of every export key; bump when the exported rows or columns change
+EXPORT_LAYOUT = 2
+
+# Format name -> (mime type, file extension)
+FORMATS = {
+    'CSV': ('text/csv', '.csv'),
+    'CSV (gzip)': ('application/gzip', '.csv.gz'),
+    'Parquet': ('application/vnd.apache.parquet', '.parquet'),
+}
+
+
+def _as_list(value):
+    if value is None or isinstance(value, (list, tuple, set)):
+        return sorted(value) if value is not None else None
+    return [value]
+
+
+def export_key(version, fmt, iso3=None, categories=None, years=None):
+    spec = {
+        'version': version,
+        'layout': EXPORT_LAYOUT,
+        'format': fmt,
+        'iso3': _as_list(iso3),
+        'categories': _as_list(categories),
+        'years': [int(y) for y in years] if years is not None else None,
+    }
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:20]
+
+
+def export_path(key, fmt, directory=EXPORT_DIR):
+    return os.path.join(directory, key + FORMATS[fmt][1])
+
+
+def _chunks(frame, chunk_rows):
+    for start in range(0, len(frame), chunk_rows):
+        yield start, frame.iloc[start:start + chunk_rows]
+
+
+def write_csv(frame, out, chunk_rows=CHUNK_ROWS):
+    if frame.empty:
+        frame.to_csv(out, index=False)
+    for start, chunk in _chunks(frame, chunk_rows):
+        chunk.to_csv(out, index=False, header=start == 0)
+
+
+def write_parquet(frame, path, chunk_rows=CHUNK_ROWS):
+    schema = pa.Schema.from_pandas(frame, preserve_index=False)
+    with pq.ParquetWriter(path, schema) as writer:
+        for _, chunk in _chunks(frame, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+# Write one export format chunk by chunk into a temp file, then move it into place
+def write_export(frame, fmt, path, chunk_rows=CHUNK_ROWS):
+    disk_cache.private_dir(os.path.dirname(path))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if fmt == 'CSV':
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as out:
+            write_csv(frame, out, chunk_rows)
+    elif fmt == 'CSV (gzip)':
+        with gzip.open(tmp_path, 'wt', newline='', encoding='utf-8') as out:
+            write_csv(frame, out, chunk_rows)
+    elif fmt == 'Parquet':
+        write_parquet(frame, tmp_path, chunk_rows)
+    else:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    os.replace(tmp_path, path)
+
+
+# Path of an export that has already been built, without building it
+def cached_export(version, fmt, iso3=None, categories=None, years=None, directory=EXPORT_DIR):
+    disk_cache.private_dir(directory)
+    path = export_path(export_key(version, fmt, iso3, categories, years), fmt, directory)
+    if not os.path.exists(path):
+        return None
+    os.utime(path)
+    return path
+
+
+def get_export(version, fmt, iso3=None, categories=None, years=None, directory=EXPORT_DIR,
+               path=dataset.DATASET_DIR, csv_path=dataset.CSV_PATH):
+    """Return the path of the export for this dataset version and filter.
+
+    Exports hold the cleaned source rows as read_frame returns them, with Value
+    as text, so censored entries such as "<0.1" are downloaded as they were
+    published. Exports are files shared by every worker on the host, so each
+    one is written once per dataset version and filter. Older files are
+    evicted by last use once the directory exceeds MAX_EXPORT_BYTES.
+    """
+    cached = cached_export(version, fmt, iso3, categories, years, directory)
+    if cached:
+        return cached
+    frame = dataset.read_frame(iso3, categories or None, years, path=path, csv_path=csv_path)
+    export = export_path(export_key(version, fmt, iso3, categories, years), fmt, directory)
+    write_export(frame, fmt, export)
+    prune(directory, keep=export)
+    return export
+
+
+# The same export built in memory, for when no export directory can be used
+def export_bytes(fmt, iso3=None, categories=None, years=None, path=dataset.DATASET_DIR,
+                 csv_path=dataset.CSV_PATH, chunk_rows=CHUNK_ROWS):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    frame = dataset.read_frame(iso3, categories or None, years, path=path, csv_path=csv_path)
+    if fmt == 'Parquet':
+        out = io.BytesIO()
+        write_parquet(frame, out, chunk_rows)
+        return out.getvalue()
+    out = io.StringIO()
+    write_csv(frame, out, chunk_rows)
+    data = out.getvalue().encode('utf-8')
+    return gzip.compress(data, mtime=0) if fmt == 'CSV (gzip)' else data
+
+
+def prune(directory=EXPORT_DIR, max_bytes=MAX_EXPORT_BYTES, keep=None):
+    entries = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.endswith('.tmp') or not os.path.isfile(path):
+            continue
+        stat = os.stat(path)
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
@@ -0,0 +1,112 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import plotly.io as pio
+
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class FigureCache:
+    """Bounded LRU cache of plotly figures stored as serialized JSON.
+
+    Entries are evicted least-recently-used first once either the entry count
+    or the total size of the stored JSON exceeds its limit. Safe to share
+    between Streamlit sessions, which run on separate threads.
+
+    With a DiskCache as `disk`, figures are also written to it and looked up
+    there on a memory miss, so other processes on the host reuse them. Keys
+    include the dataset version, so stale figures are never matched. Disk
+    entries carry the store's source fingerprint when given one, so the disk
+    cache deletes them as soon as a store for newer source files is stored.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, disk=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk = disk
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_json(self, key, source=None):
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return payload
+        payload = self._disk_get(key, source)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+        self._store(key, payload)
+        return payload
+
+    def get(self, key, source=None):
+        payload = self.get_json(key, source)
+        return None if payload is None else pio.from_json(payload)
+
+    def put(self, key, fig, source=None):
+        payload = fig.to_json() if not isinstance(fig, str) else fig
+        self._disk_put(key, payload, source)
+        return self._store(key, payload)
+
+    # A shared cache that cannot be reached (locked too long, disk full) only costs a rebuild
+    def _disk_get(self, key, source):
+        if self.disk is None:
+            return None
+        try:
+            stored = self.disk.get('figure', key, source)
+        except sqlite3.Error:
+            return None
+        return stored.decode() if stored is not None else None
+
+    def _disk_put(self, key, payload, source):
+        if self.disk is None:
+            return
+        try:
+            self.disk.put('figure', key, payload.encode(), source)
+        except sqlite3.Error:
+            pass
+
+    def _store(self, key, payload):
+        size = len(payload)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            # A figure larger than the whole budget is never kept
+            if size > self.max_bytes:
+                return payload
+            self._entries[key] = payload
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+        return payload
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,140 @@
+import copy
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from range_stats import RangeStats
+
+# Element whose rows hold the point estimate (the others are confidence bounds)
+POINT_ELEMENT = 'Value'
+
+
+# Parse the raw Value column, reading censored entries such as "<0.1" as their bound
+def parse_values(values):
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype('float32')
+    cleaned = values.astype(str).str.lstrip('<').str.strip()
+    return pd.to_numeric(cleaned, errors='coerce').astype('float32')
+
+
+# Shrink the cleaned long frame to compact dtypes
+def compact_frame(df):
+    frame = pd.DataFrame({
+        'Iso3': pd.Categorical(df['Iso3'], categories=pd.unique(df['Iso3'])),
+        'Item': df['Item'].astype('category'),
+        'Element': df['Element'].astype('category'),
+        'Year': df['Year'].astype('int16'),
+        'Unit': df['Unit'].astype('category'),
+        'Value': parse_values(df['Value']),
+        'Category': pd.Categorical(df['Category'], categories=pd.unique(df['Category'])),
+    })
+    return frame.reset_index(drop=True)
+
+
+class IndicatorStore:
+    """Year x Category float matrix per country, built once from the cleaned data.
+
+    Rows cover every year between the first and last year in the data, so a
+    year range maps to a positional row slice without scanning the frame.
+    Columns are the simplified indicator categories in their original order.
+    """
+
+    def __init__(self, df):
+        self.frame = compact_frame(df)
+        # Content fingerprint used to key anything derived from this data
+        self.version = hashlib.sha1(
+            pd.util.hash_pandas_object(self.frame, index=False).to_numpy().tobytes()
+        ).hexdigest()[:16]
+        self.countries = list(self.frame['Iso3'].cat.categories)
+        self.default_iso3 = self.countries[0] if self.countries else None
+        # Fingerprint of the files this store was read from, set by dataset.load_store
+        self.source = None
+
+        if self.frame.empty:
+            self.first_year, self.last_year = 0, -1
+        else:
+            self.first_year = int(self.frame['Year'].min())
+            self.last_year = int(self.frame['Year'].max())
+        years = pd.RangeIndex(self.first_year, self.last_year + 1, name='Year')
+        order = list(self.frame['Category'].cat.categories)
+
+        points = self.frame[self.frame['Element'] == POINT_ELEMENT]
+        self.units = (points.groupby('Category', observed=True)['Unit']
+                      .first().astype(str).to_dict())
+
+        self.panels = {}
+        for iso3, rows in points.groupby('Iso3', observed=True):
+            panel = rows.pivot_table(index='Year', columns='Category', values='Value',
+                                     aggfunc='last', observed=True)
+            panel.columns = panel.columns.astype(str)
+            panel = panel.reindex(index=years, columns=[c for c in order if c in panel.columns])
+            self.panels[iso3] = panel.astype('float32')
+        self.stats = {iso3: RangeStats(panel) for iso3, panel in self.panels.items()}
+
+    @property
+    def empty(self):
+        return not self.panels
+
+    # The same data with another default country, so code written for one country
+    # (the section layouts) works for any; the version is per country for cache keys
+    def for_country(self, iso3):
+        view = copy.copy(self)
+        view.default_iso3 = iso3
+        view.version = f"{self.version}-{iso3}"
+        return view
+
+    def year_bounds(self):
+        return self.first_year, self.last_year
+
+    # Prefix-sum statistics for a country: O(1) range means, growth and correlations
+    def range_stats(self, iso3=None):
+        return self.stats[iso3 or self.default_iso3]
+
+    # Positional row slice of a country's matrix for an inclusive year range (no copy)
+    def window(self, years=None, iso3=None):
+        panel = self.panels[iso3 or self.default_iso3]
+        if years is None:
+            return panel
+        start = max(int(years[0]) - self.first_year, 0)
+        stop = max(int(years[1]) - self.first_year + 1, 0)
+        return panel.iloc[start:stop]
+
+    # Categories with at least one observation in the year range
+    def categories(self, years=None, iso3=None):
+        window = self.window(years, iso3)
+        return list(window.columns[window.notna().to_numpy().any(axis=0)])
+
+    def series(self, category, years=None, iso3=None):
+        window = self.window(years, iso3)
+        if category not in window.columns:
+            return pd.Series(dtype='float32', index=window.index[:0], name=category)
+        return window[category].dropna()
+
+    # Wide Year x Category table for the given categories (missing ones come back empty)
+    def wide(self, categories, years=None, iso3=None):
+        return self.window(years, iso3).reindex(columns=list(categories))
+
+    # Years where every given category is observed, one column per category
+    def paired(self, categories, years=None, iso3=None):
+        return self.wide(categories, years, iso3).dropna().reset_index()
+
+    # Long Year/Category/Value rows for plotly express
+    def long(self, categories, years=None, iso3=None):
+        wide = self.wide(categories, years, iso3)
+        values = wide.to_numpy()
+        year_idx, col_idx = np.nonzero(~np.isnan(values))
+        order = np.lexsort((year_idx, col_idx))
+        year_idx, col_idx = year_idx[order], col_idx[order]
+        return pd.DataFrame({
+            'Year': wide.index.to_numpy()[year_idx],
+            'Category': wide.columns.to_numpy()[col_idx],
+            'Value': values[year_idx, col_idx],
+        })
+
+    # Most recent observation in the year range as (year, value, unit)
+    def latest(self, category, years=None, iso3=None):
+        series = self.series(category, years, iso3)
+        if series.empty:
+            return None
+        return int(series.index[-1]), float(series.iloc[-1]), self.units.get(category, '')
@@ -0,0 +1,255 @@
+import argparse
+import copy
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from dataset import CSV_PATH, DATASET_DIR, prepare_frame, read_csv, write_dataset
+
+
+RAW_CSV_PATH = 'suite-of-food-security-indicators_lka.csv'
+OUTPUT_COLUMNS = ['Iso3', 'Item', 'Element', 'Year', 'Unit', 'Value', 'Category']
+DEFAULT_CHUNKSIZE = 100_000
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Same cleaning steps as w1985555_DSPL_ICW_preprocessing.ipynb
+DROP_COLUMNS = ['Note', 'Area', 'StartDate', 'EndDate', 'Area Code', 'Area Code (M49)',
+                'Year Code', 'Element Code', 'Item Code', 'Flag']
+
+EXCLUDED_ITEMS = [
+    "Percentage of children under 5 years affected by wasting (percent)",
+    "Number of children under 5 years affected by wasting (million)",
+    "Prevalence of exclusive breastfeeding among infants 0-5 months of age (percent)",
+]
+
+TAKEN_ITEMS = [
+    "Average protein supply (g/cap/day) (3-year average)",
+    "Gross domestic product per capita, PPP, (constant 2017 international $)",
+    "Number of people undernourished (million) (3-year average)",
+    "Prevalence of severe food insecurity in the male adult population (percent) (3-year average)",
+    "Prevalence of severe food insecurity in the female adult population (percent) (3-year average)",
+    "Number of severely food insecure people (million) (3-year average)",
+    "Number of severely food insecure male adults (million) (3-year average)",
+    "Number of severely food insecure female adults (million) (3-year average)",
+    "Political stability and absence of violence/terrorism (index)",
+    "Percentage of population using safely managed drinking water services (percent)",
+    "Percentage of population using at least basic drinking water services (percent)",
+    "Number of obese adults (18 years and older) (million)",
+    "Prevalence of low birthweight (percent)",
+    "Number of newborns with low birthweight (million)",
+]
+
+
+def clean_chunk(chunk):
+    # FAOSTAT suite files carry an HXL tag row (#country+code, ...) under the header
+    chunk = chunk[~chunk['Iso3'].astype(str).str.startswith('#')]
+    chunk = chunk.drop(columns=DROP_COLUMNS, errors='ignore')
+    chunk = chunk.dropna(subset=['Element', 'Iso3'])
+    chunk = chunk[~chunk['Item'].isin(EXCLUDED_ITEMS)]
+    # The notebook fills with a non-breaking space; kept so outputs match the existing CSV
+    chunk = chunk.assign(Unit=chunk['Unit'].fillna('No\u00a0Unit'))
+    chunk = chunk[chunk['Item'].isin(TAKEN_ITEMS)]
+    chunk = chunk.assign(Year=pd.to_numeric(chunk['Year'], errors='coerce'))
+    chunk = chunk.dropna(subset=['Year']).astype({'Year': 'int64'})
+    return prepare_frame(chunk)[OUTPUT_COLUMNS]
+
+
+# Hash the whole file, plus the first `prefix_size` bytes in the same pass
+def file_digests(path, prefix_size=None):
+    digest = hashlib.sha256()
+    prefix_digest = None
+    read = 0
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(HASH_BLOCK_SIZE)
+            if not block:
+                break
+            if prefix_size is not None and prefix_digest is None and read + len(block) >= prefix_size:
+                digest.update(block[:prefix_size - read])
+                prefix_digest = digest.copy().hexdigest()
+                digest.update(block[prefix_size - read:])
+            else:
+                digest.update(block)
+            read += len(block)
+    return digest.hexdigest(), prefix_digest
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {'inputs': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# Stream the raw rows after byte `offset` (0 for the whole file) in chunks
+def read_raw_chunks(path, offset=0, chunksize=DEFAULT_CHUNKSIZE):
+    if offset == 0:
+        yield from pd.read_csv(path, chunksize=chunksize, dtype=str)
+        return
+    header = pd.read_csv(path, nrows=0).columns
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        yield from pd.read_csv(f, names=header, header=None, chunksize=chunksize, dtype=str)
+
+
+def _newline_at(path, offset):
+    if offset == 0:
+        return True
+    with open(path, 'rb') as f:
+        f.seek(offset - 1)
+        return f.read(1) == b'\n'
+
+
+def _watermark_frame(watermarks):
+    return pd.DataFrame(
+        [(iso3, item, year) for iso3, items in watermarks.items() for item, year in items.items()],
+        columns=['Iso3', 'Item', 'Watermark'],
+    )
+
+
+# Keep rows newer than the last year already ingested for their (Iso3, Item)
+def _after_watermarks(chunk, watermark_frame):
+    if watermark_frame.empty or chunk.empty:
+        return chunk
+    merged = chunk.merge(watermark_frame, on=['Iso3', 'Item'], how='left')
+    keep = merged['Year'] > merged['Watermark'].fillna(-1)
+    return chunk[keep.to_numpy()]
+
+
+def _update_watermarks(watermarks, chunk):
+    if chunk.empty:
+        return
+    for (iso3, item), year in chunk.groupby(['Iso3', 'Item'])['Year'].max().items():
+        items = watermarks.setdefault(iso3, {})
+        items[item] = max(int(year), items.get(item, -1))
+
+
+def _append(chunk, out_path):
+    header = not os.path.exists(out_path) or os.path.getsize(out_path) == 0
+    chunk.to_csv(out_path, mode='a', header=header, index=False)
+
+
+def ingest_file(path, out_path, state, chunksize=DEFAULT_CHUNKSIZE, full=False):
+    """Ingest one raw suite file into the cleaned CSV, updating its manifest entry.
+
+    Unchanged files (same content hash) are skipped. A file that only grew is
+    read from where the previous run stopped; any other change streams the
+    whole file but keeps only years past each indicator's watermark.
+    Returns the number of rows appended.
+    """
+    size = os.path.getsize(path)
+    previous_size = state.get('size', 0)
+    digest, prefix_digest = file_digests(path, previous_size if previous_size else None)
+
+    if not full and state.get('sha256') == digest:
+        return 0
+
+    offset = 0
+    watermarks = {} if full else state.get('watermarks', {})
+    appended_only = (not full and previous_size and size > previous_size
+                     and prefix_digest == state.get('sha256') and _newline_at(path, previous_size))
+    if appended_only:
+        offset = previous_size
+
+    rows = 0
+    watermark_frame = _watermark_frame(watermarks)
+    new_watermarks = copy.deepcopy(watermarks)
+    for chunk in read_raw_chunks(path, offset, chunksize):
+        cleaned = _after_watermarks(clean_chunk(chunk), watermark_frame)
+        _append(cleaned, out_path)
+        _update_watermarks(new_watermarks, cleaned)
+        rows += len(cleaned)
+
+    state.update({'sha256': digest, 'size': size, 'watermarks': new_watermarks})
+    return rows
+
+
+# Cut the output back to the size recorded with the manifest, dropping rows a run
+# appended before it stopped without saving its state. Returns False when the
+# output is shorter than recorded, since then it cannot be trusted at all.
+def _drop_uncommitted(out_path, manifest):
+    committed = manifest.get('output_size')
+    if committed is None:
+        return True
+    size = os.path.getsize(out_path)
+    if size < committed:
+        return False
+    if size > committed:
+        with open(out_path, 'r+b') as f:
+            f.truncate(committed)
+    return True
+
+
+def ingest(paths, out_path=CSV_PATH, manifest_path=None, chunksize=DEFAULT_CHUNKSIZE, full=False):
+    """Ingest raw suite files into the cleaned CSV. Returns new rows per input.
+
+    Incremental runs append to the output and save the manifest, with the
+    output's size, after each input. A run that is interrupted or fails part
+    way leaves rows past that size, which the next run cuts off before it
+    re-reads the input, so no row is appended twice.
+    """
+    manifest_path = manifest_path or f"{out_path}.manifest.json"
+    # Without earlier state we cannot tell which rows of an existing output are ours
+    full = full or not os.path.exists(manifest_path) or not os.path.exists(out_path)
+    manifest = {'inputs': {}} if full else load_manifest(manifest_path)
+    if not full and not _drop_uncommitted(out_path, manifest):
+        full, manifest = True, {'inputs': {}}
+
+    # A full rebuild writes next to the output and swaps it in at the end
+    target = f"{out_path}.tmp" if full else out_path
+    if full and os.path.exists(target):
+        os.remove(target)
+
+    results = {}
+    for path in paths:
+        state = manifest['inputs'].setdefault(os.path.abspath(path), {})
+        results[path] = ingest_file(path, target, state, chunksize, full)
+        if not full:
+            manifest['output_size'] = os.path.getsize(target)
+            save_manifest(manifest, manifest_path)
+
+    if full:
+        # The old manifest describes the old output; without one, a run interrupted
+        # after the swap starts over instead of trusting it
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        if os.path.exists(target):
+            os.replace(target, out_path)
+        else:
+            pd.DataFrame(columns=OUTPUT_COLUMNS).to_csv(out_path, index=False)
+        manifest['output_size'] = os.path.getsize(out_path)
+        save_manifest(manifest, manifest_path)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean raw FAOSTAT food security suite files into the dashboard CSV")
+    parser.add_argument('inputs', nargs='*', default=[RAW_CSV_PATH], help="Raw suite CSV files")
+    parser.add_argument('--out', default=CSV_PATH, help="Cleaned CSV to create or append to")
+    parser.add_argument('--manifest', default=None, help="Ingest state file (default: <out>.manifest.json)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk")
+    parser.add_argument('--full', action='store_true', help="Ignore previous state and rebuild the output")
+    parser.add_argument('--dataset', nargs='?', const=DATASET_DIR, default=None,
+                        help="Also rebuild the partitioned Parquet dataset (default dir: %(const)s)")
+    args = parser.parse_args()
+
+    results = ingest(args.inputs, args.out, args.manifest, args.chunksize, args.full)
+    for path, rows in results.items():
+        print(f"{path}: {rows} new rows")
+
+    if args.dataset and (args.full or any(results.values()) or not os.path.isdir(args.dataset)):
+        df = read_csv(args.out)
+        write_dataset(df, args.dataset)
+        print(f"Wrote {len(df)} rows to {args.dataset}")
+
+
+if __name__ == "__main__":
+    main()
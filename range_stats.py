@@ -0,0 +1,188 @@
+import numpy as np
+import pandas as pd
+
+
+# Running totals along the year axis with a leading zero row, so the total over
+# rows [lo, hi) is prefix[hi] - prefix[lo]
+def _prefix(values):
+    out = np.zeros((values.shape[0] + 1,) + values.shape[1:], dtype='float64')
+    np.cumsum(values, axis=0, out=out[1:])
+    return out
+
+
+class RangeStats:
+    """Constant-time year-range statistics over one Year x Category matrix.
+
+    Everything is reduced to differences of prefix sums built once at load:
+    per-indicator counts, sums and sums of squares of the values and of their
+    growth rates, and per-pair counts, sums and cross-products over the years
+    where both indicators are observed (pairwise-complete, like DataFrame.corr).
+    Values are centred on each indicator's mean first to keep the sums of
+    squares well conditioned.
+    """
+
+    def __init__(self, panel):
+        self.columns = list(panel.columns)
+        self._index = {name: i for i, name in enumerate(self.columns)}
+        self.first_year = int(panel.index[0]) if len(panel.index) else 0
+        self.n_rows = len(panel.index)
+
+        values = panel.to_numpy(dtype='float64')
+        observed = ~np.isnan(values)
+        self._observed = observed
+
+        centre = np.zeros(values.shape[1])
+        has_values = observed.any(axis=0)
+        centre[has_values] = np.nanmean(values[:, has_values], axis=0)
+        x = np.where(observed, values - centre, 0.0)
+        m = observed.astype('float64')
+
+        # Single indicator moments
+        self._n = _prefix(m)
+        self._s = _prefix(x)
+        self._ss = _prefix(x * x)
+
+        # Pairwise-complete moments: entry [t, i, j] only counts years where both are observed
+        self._pn = _prefix(np.einsum('ti,tj->tij', m, m))
+        self._px = _prefix(np.einsum('ti,tj->tij', x, m))
+        self._pxx = _prefix(np.einsum('ti,tj->tij', x * x, m))
+        self._pxy = _prefix(np.einsum('ti,tj->tij', x, x))
+
+        # Growth between consecutive observations, stored on the later one's row,
+        # which matches Series.dropna().pct_change()
+        growth = np.full(values.shape, np.nan)
+        for col in range(values.shape[1]):
+            rows = np.flatnonzero(observed[:, col])
+            if len(rows) > 1:
+                previous = values[rows[:-1], col]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    growth[rows[1:], col] = values[rows[1:], col] / previous - 1
+        growth[~np.isfinite(growth)] = np.nan
+        has_growth = ~np.isnan(growth)
+        g = np.where(has_growth, growth, 0.0)
+        self._gn = _prefix(has_growth.astype('float64'))
+        self._gs = _prefix(g)
+        self._gss = _prefix(g * g)
+        self._centre = centre
+
+        # First observed row at or after each row (n_rows when none), so the
+        # growth that links into a range from outside it can be skipped
+        next_observed = np.full((self.n_rows + 1, values.shape[1]), self.n_rows, dtype='int64')
+        for row in range(self.n_rows - 1, -1, -1):
+            next_observed[row] = np.where(observed[row], row, next_observed[row + 1])
+        self._next_observed = next_observed
+
+    def _rows(self, years):
+        if years is None:
+            return 0, self.n_rows
+        lo = min(max(int(years[0]) - self.first_year, 0), self.n_rows)
+        hi = min(max(int(years[1]) - self.first_year + 1, lo), self.n_rows)
+        return lo, hi
+
+    def _col(self, category):
+        return self._index[category]
+
+    def count(self, category, years=None):
+        lo, hi = self._rows(years)
+        col = self._col(category)
+        return int(self._n[hi, col] - self._n[lo, col])
+
+    def mean(self, category, years=None):
+        lo, hi = self._rows(years)
+        col = self._col(category)
+        n = self._n[hi, col] - self._n[lo, col]
+        if n < 1:
+            return np.nan
+        return (self._s[hi, col] - self._s[lo, col]) / n + self._centre[col]
+
+    def std(self, category, years=None):
+        lo, hi = self._rows(years)
+        col = self._col(category)
+        return _std(self._n[hi, col] - self._n[lo, col],
+                    self._s[hi, col] - self._s[lo, col],
+                    self._ss[hi, col] - self._ss[lo, col])
+
+    # Growth sums over the range, leaving out the growth into its first observation
+    def _growth_sums(self, category, years):
+        lo, hi = self._rows(years)
+        col = self._col(category)
+        start = min(self._next_observed[lo, col] + 1, hi) if hi > lo else hi
+        return (self._gn[hi, col] - self._gn[start, col],
+                self._gs[hi, col] - self._gs[start, col],
+                self._gss[hi, col] - self._gss[start, col])
+
+    # Mean period-on-period growth as a fraction, like Series.pct_change().mean()
+    def growth_mean(self, category, years=None):
+        n, s, _ = self._growth_sums(category, years)
+        return s / n if n >= 1 else np.nan
+
+    # Sample std of period-on-period growth, like Series.pct_change().std()
+    def growth_std(self, category, years=None):
+        return _std(*self._growth_sums(category, years))
+
+    # growth_mean and growth_std for every (first, last) row pair at once, as
+    # n_rows x n_rows arrays indexed [first, last] (NaN where last < first)
+    def growth_tables(self, category):
+        col = self._col(category)
+        lo = np.arange(self.n_rows)[:, None]
+        hi = np.arange(self.n_rows)[None, :] + 1
+        start = np.minimum(self._next_observed[lo, col] + 1, hi)
+        n = self._gn[hi, col] - self._gn[start, col]
+        s = self._gs[hi, col] - self._gs[start, col]
+        ss = self._gss[hi, col] - self._gss[start, col]
+        valid = hi > lo
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(valid & (n >= 1), s / n, np.nan)
+            std = np.where(valid & (n >= 2), np.sqrt(np.maximum((ss - s * s / n) / (n - 1), 0.0)), np.nan)
+        return mean, std
+
+    # Last observed row at or before each row (-1 when none), for the latest value in a range
+    def last_observed(self, category):
+        col = self._col(category)
+        rows = np.where(self._observed[:, col], np.arange(self.n_rows), -1)
+        return np.maximum.accumulate(rows) if self.n_rows else rows
+
+    # Pearson correlation over the years where both indicators are observed
+    def corr(self, a, b, years=None):
+        lo, hi = self._rows(years)
+        i, j = self._col(a), self._col(b)
+        return _corr(*(arr[hi] - arr[lo] for arr in self._pair_arrays()), i, j)
+
+    def corr_matrix(self, categories, years=None):
+        lo, hi = self._rows(years)
+        cols = [self._col(c) for c in categories]
+        sel = np.ix_(cols, cols)
+        n, sx, sxx, sxy = ((arr[hi] - arr[lo])[sel] for arr in self._pair_arrays())
+        sy, syy = sx.T, sxx.T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = sxy - sx * sy / n
+            var_x = sxx - sx * sx / n
+            var_y = syy - sy * sy / n
+            result = cov / np.sqrt(var_x * var_y)
+        result[(n < 2) | (var_x <= 0) | (var_y <= 0)] = np.nan
+        result = np.clip(result, -1.0, 1.0)
+        diagonal = np.diag_indices_from(result)
+        result[diagonal] = np.where(np.isnan(result[diagonal]), np.nan, 1.0)
+        return pd.DataFrame(result, index=list(categories), columns=list(categories))
+
+    def _pair_arrays(self):
+        return self._pn, self._px, self._pxx, self._pxy
+
+
+def _std(n, s, ss):
+    if n < 2:
+        return np.nan
+    variance = (ss - s * s / n) / (n - 1)
+    return float(np.sqrt(max(variance, 0.0)))
+
+
+def _corr(n, sx, sxx, sxy, i, j):
+    n, x, xx, xy = n[i, j], sx[i, j], sxx[i, j], sxy[i, j]
+    y, yy = sx[j, i], sxx[j, i]
+    if n < 2:
+        return np.nan
+    var_x = xx - x * x / n
+    var_y = yy - y * y / n
+    if var_x <= 0 or var_y <= 0:
+        return np.nan
+    return float(np.clip((xy - x * y / n) / np.sqrt(var_x * var_y), -1.0, 1.0))
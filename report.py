@@ -0,0 +1,283 @@
+import argparse
+import hashlib
+import html
+import json
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+import plotly.offline
+
+import charts
+import dataset
+import disk_cache
+from charts import ANALYSIS_SECTIONS
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+REPORT_DIR = 'reports'
+MANIFEST_NAME = 'manifest.json'
+PLOTLY_JS_NAME = 'plotly.min.js'
+# Changing any of these changes how a report looks, so it re-renders every item
+RENDERER_FILES = ['charts.py', 'downsample.py', 'report.py']
+
+
+def renderer_version():
+    digest = hashlib.sha1()
+    for name in RENDERER_FILES:
+        with open(os.path.join(ROOT, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+# Fingerprint of one country's data, so a change elsewhere does not re-render it
+def country_version(store, iso3):
+    panel = store.panels[iso3]
+    digest = hashlib.sha1(pd.util.hash_pandas_object(panel).to_numpy().tobytes())
+    digest.update(json.dumps({c: store.units.get(c, '') for c in panel.columns}, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+def item_name(iso3, years):
+    return f"{iso3}/{years[0]}-{years[1]}"
+
+
+def item_key(store, iso3, years, options, renderer):
+    spec = {'data': country_version(store, iso3), 'years': list(years), 'options': options, 'renderer': renderer}
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:20]
+
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {'items': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_atomic(path, data, mode='w'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, mode) as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def save_manifest(manifest, out_dir):
+    _write_atomic(os.path.join(out_dir, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True))
+
+
+def _slug(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or 'figure'
+
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+{plotly_js}
+<style>
+    body {{ font-family: sans-serif; margin: 24px; }}
+    .columns {{ display: grid; gap: 24px; }}
+    .metric {{ margin: 12px 0; }}
+    .metric-label {{ color: #555; font-size: 14px; }}
+    .metric-value {{ font-size: 28px; }}
+    .error {{ color: #b00020; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<p>Generated {generated} from dataset version {version}.</p>
+{body}
+</body>
+</html>
+"""
+
+
+# Figures and metrics of every dashboard section for one country and year window
+def render_sections(store, years, write_json, figure_dir):
+    parts, files = [], []
+    figures = 0
+    for name, layout in ANALYSIS_SECTIONS.items():
+        section = layout(store, years)
+        columns = []
+        for items in section.columns:
+            cells = []
+            for item in items:
+                if isinstance(item, charts.Metric):
+                    label, value = item.label, item.value
+                elif isinstance(item, charts.RangeMetric):
+                    label, value = item.label, charts.metric_value(store, item, years)
+                else:
+                    label = None
+                if label is not None:
+                    cells.append(f'<div class="metric"><div class="metric-label">{html.escape(label)}</div>'
+                                 f'<div class="metric-value">{html.escape(value)}</div></div>')
+                    continue
+                try:
+                    fig = charts.build_figure(store, item)
+                except Exception as e:
+                    cells.append(f'<p class="error">Could not build this chart: {html.escape(str(e))}</p>')
+                    continue
+                title = fig.layout.title.text or item.kind
+                div_id = f"{_slug(name)}-{figures}"
+                figures += 1
+                cells.append(fig.to_html(full_html=False, include_plotlyjs=False, div_id=div_id))
+                if write_json:
+                    path = os.path.join(figure_dir, f"{div_id}-{_slug(title.split('<br>')[0])}.json")
+                    _write_atomic(path, fig.to_json())
+                    files.append(path)
+            columns.append('<div>' + '\n'.join(cells) + '</div>')
+        heading = section.heading.lstrip('#').strip()
+        parts.append(f'<h2>{html.escape(heading)}</h2>\n'
+                     f'<div class="columns" style="grid-template-columns: repeat({len(columns)}, minmax(0, 1fr))">'
+                     + '\n'.join(columns) + '</div>')
+    return parts, files
+
+
+# Report process state: the store for every country, loaded once per worker
+_store = None
+
+
+def init_worker(path, csv_path):
+    global _store
+    _store = dataset.load_store(None, path, csv_path, cache=disk_cache.default_cache())
+
+
+def render_item(iso3, years, out_dir, plotly_js, write_json):
+    """Render one (country, year window) page and its figure JSON into out_dir.
+
+    Runs in a pool worker. Files are written to temporary names and moved into
+    place, so an interrupted run never leaves a half-written page behind.
+    """
+    start = time.perf_counter()
+    store = _store.for_country(iso3)
+    item_dir = os.path.join(out_dir, iso3, f"{years[0]}-{years[1]}")
+    parts, files = render_sections(store, years, write_json, os.path.join(item_dir, 'figures'))
+
+    if plotly_js == 'cdn':
+        script = (f'<script src="https://cdn.plot.ly/plotly-{plotly.offline.get_plotlyjs_version()}.min.js" '
+                  'charset="utf-8"></script>')
+    else:
+        script = f'<script src="../../{PLOTLY_JS_NAME}" charset="utf-8"></script>'
+    page = PAGE_TEMPLATE.format(
+        title=html.escape(f"{iso3} Food Security Indicators, {years[0]}-{years[1]}"),
+        plotly_js=script,
+        generated=time.strftime('%Y-%m-%d %H:%M:%S'),
+        version=html.escape(store.version),
+        body='\n'.join(parts),
+    )
+    page_path = os.path.join(item_dir, 'index.html')
+    _write_atomic(page_path, page)
+    relative = [os.path.relpath(p, out_dir) for p in [page_path] + files]
+    return {'files': relative, 'seconds': round(time.perf_counter() - start, 3)}
+
+
+def write_index(manifest, out_dir):
+    rows = ''.join(f'<li><a href="{html.escape(name)}/index.html">{html.escape(name)}</a></li>\n'
+                   for name in sorted(manifest['items']))
+    _write_atomic(os.path.join(out_dir, 'index.html'),
+                  f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Food Security Reports</title></head>\n'
+                  f'<body><h1>Food Security Reports</h1>\n<ul>\n{rows}</ul></body></html>\n')
+
+
+# Year windows clamped to the data's bounds; a reversed window or one outside the data is an error
+def parse_windows(values, bounds):
+    windows = []
+    for value in values or ['all']:
+        if value == 'all':
+            windows.append(tuple(bounds))
+            continue
+        first, _, last = value.partition('-')
+        try:
+            first, last = int(first), int(last)
+        except ValueError:
+            raise SystemExit(f"Year window must look like 2010-2020 or 'all', got {value!r}")
+        if first > last:
+            raise SystemExit(f"Year window {value!r} ends before it starts")
+        if last < bounds[0] or first > bounds[1]:
+            raise SystemExit(f"Year window {value!r} is outside the data ({bounds[0]}-{bounds[1]})")
+        windows.append((max(first, bounds[0]), min(last, bounds[1])))
+    return list(dict.fromkeys(windows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render static dashboard reports for countries and year windows")
+    parser.add_argument('--out', default=REPORT_DIR, help="Output directory")
+    parser.add_argument('--iso3', action='append', help="Country to render (repeatable, default: all)")
+    parser.add_argument('--years', action='append', metavar='FROM-TO',
+                        help="Year window to render (repeatable, default: 'all' for the full range)")
+    parser.add_argument('--json', action='store_true', help="Also write each figure's JSON spec")
+    parser.add_argument('--plotly-js', choices=['cdn', 'local'], default='cdn',
+                        help="Load plotly.js from the CDN, or from one copy written to the output directory")
+    parser.add_argument('--workers', type=int, default=charts.default_workers(), help="Worker processes")
+    parser.add_argument('--force', action='store_true', help="Re-render items whose inputs have not changed")
+    parser.add_argument('--csv', default=dataset.CSV_PATH, help="Cleaned CSV")
+    parser.add_argument('--dataset', default=dataset.DATASET_DIR, help="Partitioned Parquet dataset, used when current")
+    args = parser.parse_args()
+
+    init_worker(args.dataset, args.csv)
+    store = _store
+    countries = [c.upper() for c in args.iso3] if args.iso3 else sorted(store.panels)
+    missing = [c for c in countries if c not in store.panels]
+    if missing:
+        raise SystemExit(f"No data for: {', '.join(missing)}")
+    windows = parse_windows(args.years, store.year_bounds())
+
+    os.makedirs(args.out, exist_ok=True)
+    if args.plotly_js == 'local' and not os.path.exists(os.path.join(args.out, PLOTLY_JS_NAME)):
+        _write_atomic(os.path.join(args.out, PLOTLY_JS_NAME), plotly.offline.get_plotlyjs())
+
+    manifest = load_manifest(args.out)
+    renderer = renderer_version()
+    options = {'json': args.json, 'plotly_js': args.plotly_js}
+    todo, skipped = [], 0
+    for iso3 in countries:
+        for years in windows:
+            name = item_name(iso3, years)
+            key = item_key(store, iso3, years, options, renderer)
+            entry = manifest['items'].get(name)
+            unchanged = (entry and entry['key'] == key
+                         and all(os.path.exists(os.path.join(args.out, f)) for f in entry['files']))
+            if unchanged and not args.force:
+                skipped += 1
+            else:
+                todo.append((name, key, iso3, years))
+    print(f"{len(todo)} report item(s) to render, {skipped} unchanged")
+
+    failures = []
+
+    # Each item is recorded as soon as it finishes, so an interrupted run resumes where it stopped
+    def record(name, key, result):
+        try:
+            result = result()
+        except Exception as e:
+            failures.append(name)
+            print(f"{name}: failed: {e}")
+            return
+        manifest['items'][name] = dict(result, key=key, rendered=time.strftime('%Y-%m-%dT%H:%M:%S'))
+        save_manifest(manifest, args.out)
+        print(f"{name}: {len(result['files'])} file(s) in {result['seconds']}s")
+
+    if args.workers <= 1 or len(todo) <= 1:
+        for name, key, iso3, years in todo:
+            record(name, key, lambda: render_item(iso3, years, args.out, args.plotly_js, args.json))
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=init_worker, initargs=(args.dataset, args.csv)) as pool:
+            futures = {pool.submit(render_item, iso3, years, args.out, args.plotly_js, args.json): (name, key)
+                       for name, key, iso3, years in todo}
+            for future in as_completed(futures):
+                record(*futures[future], future.result)
+
+    write_index(manifest, args.out)
+    if failures:
+        raise SystemExit(f"{len(failures)} report item(s) failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import disk_cache
+import tracing
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(ROOT, 'app.py')
+PAGES = ["Dashboard", "Project Info", "Student Info", "Dataset Info"]
+
+# Load the data and build the default figures in the background after the first page
+WARM_CACHES = os.environ.get('DASHBOARD_WARM_CACHES', '0') not in ('', '0')
+
+_warmer = None
+_warmer_lock = threading.Lock()
+
+
+def warm_caches(client_years=False):
+    """Import the plotting stack, load the default country's store and build the
+    Dashboard's default figures into the shared disk cache.
+
+    Runs on a background thread, outside any Streamlit script, so it only fills
+    the process-independent caches; the script's own cached loaders then find
+    the store and figures there on the first Dashboard visit.
+    """
+    import charts
+    import dataset
+    from figure_cache import FigureCache
+
+    with tracing.span('warm_caches'):
+        cache = disk_cache.default_cache()
+        store = dataset.load_store(dataset.DEFAULT_ISO3, cache=cache)
+        if cache is None or store.empty:
+            return
+        figures = FigureCache(disk=cache)
+        years = None if client_years else store.year_bounds()
+        for layout in charts.ANALYSIS_SECTIONS.values():
+            for items in layout(store, years).columns:
+                for item in items:
+                    if not isinstance(item, charts.FigureSpec):
+                        continue
+                    spec = charts.with_year_slider(item) if client_years else item
+                    key = (spec, store.version)
+                    if figures.get_json(key, store.source) is not None:
+                        continue
+                    try:
+                        figures.put(key, charts.build_figure(store, spec), store.source)
+                    except Exception:
+                        # The dashboard reports the error when it builds this figure itself
+                        pass
+
+
+# Start warm_caches once per server process
+def start_cache_warmer(client_years=False):
+    global _warmer
+    with _warmer_lock:
+        if _warmer is None:
+            _warmer = threading.Thread(target=warm_caches, args=(client_years,),
+                                       name='cache-warmer', daemon=True)
+            _warmer.start()
+    return _warmer
+
+
+# Runs inside a fresh `python -X importtime` worker: render one page cold and time it
+def measure_page(page, app_path=APP_PATH):
+    start = time.perf_counter()
+    from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+    from streamlit.testing.v1 import AppTest
+    framework_ready = time.perf_counter()
+
+    marks = {}
+    enqueue = ForwardMsgQueue.enqueue
+
+    # The first element after the sidebar navigation is the page's first paint
+    def timed_enqueue(queue, msg):
+        if msg.HasField('delta') and msg.delta.HasField('new_element'):
+            now = time.perf_counter()
+            kind = msg.delta.new_element.WhichOneof('type')
+            if 'navigation' in marks:
+                marks.setdefault('first_paint', now)
+            elif kind == 'radio':
+                marks['navigation'] = now
+            if kind == 'plotly_chart':
+                marks.setdefault('first_chart', now)
+        return enqueue(queue, msg)
+
+    ForwardMsgQueue.enqueue = timed_enqueue
+    app = AppTest.from_file(app_path, default_timeout=600)
+    app.session_state['page'] = page
+    before = set(sys.modules)
+    script_start = time.perf_counter()
+    app.run()
+    done = time.perf_counter()
+
+    def since_script(name):
+        return round((marks[name] - script_start) * 1000, 1) if name in marks else None
+
+    return {
+        'page': page,
+        'framework_ms': round((framework_ready - start) * 1000, 1),
+        'first_paint_ms': since_script('first_paint'),
+        'first_chart_ms': since_script('first_chart'),
+        'script_ms': round((done - script_start) * 1000, 1),
+        'errors': [str(e.value) for e in app.exception],
+        'script_imports': sorted(set(sys.modules) - before),
+    }
+
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+# Self time (ms) per top-level package for the modules imported while the script ran
+def import_times(stderr, modules):
+    modules = set(modules)
+    totals = defaultdict(float)
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match and match.group(4) in modules:
+            totals[match.group(4).split('.')[0]] += int(match.group(1)) / 1000
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def run_worker(page, app_path, cache_path):
+    command = [sys.executable, '-X', 'importtime', os.path.abspath(__file__),
+               '--worker', page, '--app', app_path]
+    env = dict(os.environ, DASHBOARD_CACHE_PATH=cache_path,
+               PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    started = time.perf_counter()
+    completed = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+    wall = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"Startup worker for {page} failed:\n{completed.stderr[-2000:]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    packages = import_times(completed.stderr, result.pop('script_imports'))
+    return dict(result, process_ms=round(wall, 1), import_ms=round(sum(packages.values()), 1),
+                packages={name: round(ms, 1) for name, ms in list(packages.items())[:5]})
+
+
+def print_report(results):
+    print(f"{'page':<16}{'process':>10}{'framework':>11}{'1st paint':>11}{'1st chart':>11}"
+          f"{'script':>10}{'imports':>10}  heaviest imports during the script (ms)")
+    for r in results:
+        heaviest = ', '.join(f"{name} {ms:.0f}" for name, ms in r['packages'].items())
+        cells = [r['process_ms'], r['framework_ms'], r['first_paint_ms'], r['first_chart_ms'],
+                 r['script_ms'], r['import_ms']]
+        row = ''.join(f"{'-' if c is None else f'{c:.0f}':>{w}}" for c, w in zip(cells, (10, 11, 11, 11, 10, 10)))
+        status = '  ERROR: ' + '; '.join(r['errors']) if r['errors'] else ''
+        print(f"{r['page']:<16}{row}  {heaviest}{status}")
+    print("\nAll times in ms. process: interpreter start to script end; framework: importing "
+          "Streamlit; 1st paint / 1st chart / script: from script start.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start report: import time and time to first paint per page")
+    parser.add_argument('--pages', default=','.join(PAGES), help="Comma separated pages to measure")
+    parser.add_argument('--app', default=APP_PATH, help="Streamlit script to measure")
+    parser.add_argument('--json', default=None, help="Write results as JSON lines to this file")
+    parser.add_argument('--shared-cache', action='store_true',
+                        help="Use the host's shared disk cache instead of an empty one per page")
+    parser.add_argument('--worker', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure_page(args.worker, args.app)))
+        return
+
+    # Each page is measured in its own fresh interpreter, as a newly started replica would be
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for i, page in enumerate(args.pages.split(',')):
+            cache_path = disk_cache.CACHE_PATH if args.shared_cache else os.path.join(workdir, f'cache-{i}.sqlite')
+            results.append(run_worker(page, os.path.abspath(args.app), cache_path))
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as out:
+            for result in results:
+                out.write(json.dumps(result) + "\n")
+    if any(r['errors'] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
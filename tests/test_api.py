@@ -0,0 +1,154 @@
+import gzip
+import json
+import re
+import socket
+import struct
+import threading
+import time
+from http.client import HTTPConnection
+
+import pytest
+
+import api
+
+
+@pytest.fixture(scope='module')
+def server():
+    service = api.IndicatorService(path='no-dataset')
+    server = api.QueryServer(('127.0.0.1', 0), service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method, path, body=None, headers=None):
+    connection = HTTPConnection(*server.server_address, timeout=30)
+    payload = json.dumps(body).encode() if body is not None else None
+    connection.request(method, path, body=payload, headers=headers or {})
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    if response.getheader('Content-Encoding') == 'gzip':
+        data = gzip.decompress(data)
+    return response, json.loads(data) if data else None
+
+
+def test_series_and_not_modified(server):
+    response, payload = request(server, 'GET', '/v1/series?iso3=LKA&category=Obesity&from=2010&to=2015')
+    assert response.status == 200
+    assert payload['data']['Obesity']['years'] == list(range(2010, 2016))
+    etag = response.getheader('ETag')
+
+    response, payload = request(server, 'GET', '/v1/series?iso3=LKA&category=Obesity&from=2010&to=2015',
+                                headers={'If-None-Match': etag})
+    assert response.status == 304
+    assert payload is None
+
+
+def test_gzip_is_used_when_accepted(server):
+    response, payload = request(server, 'GET', '/v1/stats?corr=1', headers={'Accept-Encoding': 'gzip'})
+    assert response.status == 200
+    assert response.getheader('Content-Encoding') == 'gzip'
+    assert len(payload['data']['corr']) == len(payload['data']['indicators'])
+
+
+@pytest.mark.parametrize('path, status', [
+    ('/v1/nothing', 404),
+    ('/v1/series?iso3=XXX', 404),
+    ('/v1/series?category=Unknown', 404),
+    ('/v1/series?from=soon', 400),
+    ('/v1/series?from=2015&to=2010', 400),
+])
+def test_bad_queries_get_json_errors(server, path, status):
+    response, payload = request(server, 'GET', path)
+    assert response.status == status
+    assert payload['status'] == status and payload['error']
+
+
+def test_batch_reports_an_error_per_item(server):
+    queries = [
+        {'endpoint': 'latest', 'categories': ['Obesity']},
+        {'endpoint': 'series', 'iso3': 5},
+        {'endpoint': 'series', 'categories': 5},
+        {'endpoint': 'series', 'categories': [['Obesity']]},
+        {'endpoint': ['series']},
+        {'endpoint': 'stats', 'from': {'year': 2010}},
+    ]
+    response, payload = request(server, 'POST', '/v1/batch', {'queries': queries})
+    assert response.status == 200
+    results = payload['results']
+    assert results[0]['data']['Obesity']['unit']
+    assert [r.get('status') for r in results[1:]] == [400, 400, 400, 404, 400]
+
+
+def test_malformed_batches_are_rejected(server):
+    response, payload = request(server, 'POST', '/v1/batch', {'queries': 'all'})
+    assert response.status == 400
+    response, payload = request(server, 'POST', '/v1/batch', [1, 2])
+    assert response.status == 400
+
+
+def test_unexpected_errors_return_json_500(server, monkeypatch, capsys):
+    def broken(query):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(server.service, 'result', broken)
+    response, payload = request(server, 'GET', '/v1/latest?category=Protein%20Supply&from=2001')
+    assert response.status == 500
+    assert payload == {'error': 'Internal server error', 'status': 500}
+
+    response, payload = request(server, 'POST', '/v1/batch', {'queries': [{'endpoint': 'latest', 'from': 2002}]})
+    assert response.status == 200
+    assert payload['results'] == [{'error': 'Internal server error', 'status': 500}]
+
+
+def raw_request(server, data, timeout=5):
+    with socket.create_connection(server.server_address, timeout=timeout) as sock:
+        sock.sendall(data)
+        response = b''
+        while b'\r\n\r\n' not in response:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            response += chunk
+        head, _, body = response.partition(b'\r\n\r\n')
+        length = int(re.search(rb'Content-Length: (\d+)', head).group(1))
+        while len(body) < length:
+            body += sock.recv(65536)
+        return int(head.split()[1]), json.loads(body)
+
+
+@pytest.mark.parametrize('length', [b'lots', b'-1'])
+def test_bad_content_length_gets_a_json_400(server, length):
+    status, payload = raw_request(
+        server, b'POST /v1/batch HTTP/1.1\r\nHost: x\r\nContent-Length: ' + length + b'\r\n\r\n{}')
+    assert status == 400
+    assert 'Content-Length' in payload['error']
+
+
+def test_client_hanging_up_is_not_reported_as_a_data_error(server, monkeypatch, capsys):
+    original = server.service.response
+    answered = threading.Event()
+
+    def slow(key, make_payload):
+        time.sleep(0.3)
+        try:
+            return original(key, make_payload)
+        finally:
+            answered.set()
+
+    monkeypatch.setattr(server.service, 'response', slow)
+    sock = socket.create_connection(server.server_address)
+    sock.sendall(b'GET /v1/series?from=2001 HTTP/1.1\r\nHost: x\r\n\r\n')
+    # Reset rather than close, so the server's write fails
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+    sock.close()
+    assert answered.wait(5)
+    time.sleep(0.2)
+    assert 'Traceback' not in capsys.readouterr().err
+
+    monkeypatch.setattr(server.service, 'response', original)
+    response, payload = request(server, 'GET', '/v1/latest')
+    assert response.status == 200
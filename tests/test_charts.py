@@ -0,0 +1,35 @@
+import pytest
+
+import charts
+import dataset
+
+
+@pytest.fixture(scope='module')
+def store():
+    return dataset.load_store(path='no-dataset')
+
+
+def client_figures(store):
+    for layout in charts.ANALYSIS_SECTIONS.values():
+        for items in layout(store, None).columns:
+            for item in items:
+                if isinstance(item, charts.FigureSpec):
+                    yield item, charts.build_figure(store, charts.with_year_slider(item))
+
+
+def test_client_year_charts_either_have_a_range_slider_or_say_they_show_all_years(store):
+    first, last = store.year_bounds()
+    note = f"All years, {first}-{last}"
+    for spec, fig in client_figures(store):
+        titles = [fig.layout.title.text or ''] + [t.title.text or '' for t in fig.data if t.type == 'indicator']
+        if dict(spec.options).get('x') == 'Year':
+            assert fig.layout.xaxis.rangeslider.visible
+            assert not any(note in title for title in titles)
+        else:
+            assert any(note in title for title in titles), spec
+
+
+def test_server_year_charts_have_no_note(store):
+    spec = charts.figure_spec('correlation_heatmap', ['Obesity', 'GDP per capita'], store.year_bounds(),
+                              title="Correlations")
+    assert charts.build_figure(store, spec).layout.title.text == "Correlations"
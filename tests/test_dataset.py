@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+import dataset
+
+
+@pytest.fixture
+def source(tmp_path):
+    csv_path = tmp_path / 'cleaned.csv'
+    frame = dataset.read_csv()
+    frame.drop(columns='Category').to_csv(csv_path, index=False)
+    return frame, str(csv_path), str(tmp_path / 'dataset')
+
+
+def test_dataset_round_trips_the_csv(source):
+    frame, csv_path, path = source
+    dataset.write_dataset(frame, path)
+    assert dataset.dataset_is_current(path, csv_path)
+
+    from_dataset = dataset.read_frame(path=path, csv_path=csv_path)
+    from_csv = dataset.read_frame(path=path + '-missing', csv_path=csv_path)
+    assert from_dataset['Value'].tolist() == from_csv['Value'].tolist()
+    assert '<0.1' in set(from_dataset['Value'])
+
+
+def test_rebuild_drops_partitions_missing_from_the_data(source):
+    frame, csv_path, path = source
+    dataset.write_dataset(frame, path)
+    dataset.write_dataset(frame[frame['Category'] != 'Obesity'], path)
+
+    rebuilt = dataset.read_frame(path=path, csv_path=csv_path)
+    assert 'Obesity' not in set(rebuilt['Category'])
+    assert not os.path.exists(os.path.join(path, 'Iso3=LKA', 'Category=Obesity'))
+    assert sorted(os.listdir(os.path.dirname(path))) == ['cleaned.csv', 'dataset']
+
+
+def test_dataset_in_an_older_layout_is_not_read(source):
+    frame, csv_path, path = source
+    dataset.write_dataset(frame, path)
+    with open(os.path.join(path, dataset.BUILD_MARKER), 'w') as marker:
+        marker.write(f"{len(frame)}\n")
+    assert not dataset.dataset_is_current(path, csv_path)
+
+
+def test_read_frame_pushes_filters_down(source):
+    frame, csv_path, path = source
+    dataset.write_dataset(frame, path)
+    rows = dataset.read_frame('LKA', ['Protein Supply'], (2005, 2010), path=path, csv_path=csv_path)
+    assert set(rows['Category']) == {'Protein Supply'}
+    assert rows['Year'].between(2005, 2010).all()
@@ -0,0 +1,59 @@
+import os
+import stat
+
+import pytest
+
+import disk_cache
+
+
+def test_values_round_trip_and_build_once(tmp_path):
+    cache = disk_cache.DiskCache(str(tmp_path / 'cache.sqlite'))
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {'rows': [1, 2, 3]}
+
+    assert cache.get_or_build('store', 'LKA', build) == {'rows': [1, 2, 3]}
+    assert cache.get_or_build('store', 'LKA', build) == {'rows': [1, 2, 3]}
+    assert len(calls) == 1
+
+
+def test_a_new_source_fingerprint_replaces_older_entries(tmp_path):
+    source = tmp_path / 'data.csv'
+    source.write_text('a\n1\n')
+    cache = disk_cache.DiskCache(str(tmp_path / 'cache.sqlite'))
+    old = disk_cache.file_fingerprint(str(source))
+    cache.put('store', 'LKA', b'old', old)
+
+    source.write_text('a\n2\n')
+    new = disk_cache.file_fingerprint(str(source))
+    assert cache.get('store', 'LKA', new) is None
+    cache.put('store', 'LKA', b'new', new)
+    assert cache.get('store', 'LKA', new) == b'new'
+    assert cache.get('store', 'LKA', old) is None
+
+
+def test_cache_file_is_private(tmp_path):
+    path = tmp_path / 'private' / 'cache.sqlite'
+    disk_cache.DiskCache(str(path))
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(path.parent).st_mode) == 0o700
+
+
+@pytest.mark.skipif(os.name != 'posix', reason="POSIX permissions")
+def test_cache_in_a_directory_others_can_write_is_refused(tmp_path):
+    shared = tmp_path / 'shared'
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(PermissionError):
+        disk_cache.DiskCache(str(shared / 'cache.sqlite'))
+
+
+@pytest.mark.skipif(os.name != 'posix', reason="POSIX permissions")
+def test_planted_cache_file_is_refused(tmp_path):
+    path = tmp_path / 'cache.sqlite'
+    path.touch()
+    path.chmod(0o666)
+    with pytest.raises(PermissionError):
+        disk_cache.DiskCache(str(path))
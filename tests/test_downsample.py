@@ -0,0 +1,86 @@
+import numpy as np
+import plotly.graph_objects as go
+
+import downsample
+
+
+def noisy_line(n, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.arange(n, dtype='float64')
+    return x, np.sin(x / 500) + rng.random(n)
+
+
+def test_lttb_keeps_the_end_points_and_the_requested_count():
+    x, y = noisy_line(5_000)
+    keep = downsample.lttb(x, y, 100)
+    assert len(keep) == 100
+    assert keep[0] == 0 and keep[-1] == len(x) - 1
+    assert np.all(np.diff(keep) > 0)
+
+
+def test_lttb_keeps_a_spike():
+    x = np.arange(1_000, dtype='float64')
+    y = np.zeros(1_000)
+    y[437] = 50
+    assert 437 in downsample.lttb(x, y, 50)
+
+
+def test_minmax_keeps_every_bucket_extreme():
+    x, y = noisy_line(10_000)
+    keep = downsample.minmax(x, y, 200)
+    assert len(keep) <= 202
+    assert np.argmax(y) in keep and np.argmin(y) in keep
+
+
+def test_small_figures_are_returned_untouched():
+    fig = go.Figure([go.Scatter(x=list(range(50)), y=list(range(50)))], layout={'title_text': 'Small'})
+    assert downsample.reduce_figure(fig) is fig
+    assert fig.data[0].type == 'scatter'
+    assert fig.layout.title.text == 'Small'
+
+
+def test_line_traces_switch_to_webgl_and_are_decimated():
+    x, y = noisy_line(400_000)
+    fig = go.Figure([go.Scatter(x=x, y=y, name='series', mode='lines')], layout={'title_text': 'Trend'})
+    downsample.reduce_figure(fig)
+    trace = fig.data[0]
+    assert trace.type == 'scattergl'
+    assert trace.name == 'series'
+    assert len(trace.y) == downsample.MAX_FIGURE_POINTS
+    assert trace.x[0] == x[0] and trace.x[-1] == x[-1]
+    assert fig.layout.title.text == 'Trend<br><sup>WebGL, LTTB 10,000 of 400,000 points</sup>'
+
+
+def test_traces_under_the_point_budget_only_switch_to_webgl():
+    x, y = noisy_line(2_000)
+    fig = downsample.reduce_figure(go.Figure([go.Scatter(x=x, y=y)]))
+    assert fig.data[0].type == 'scattergl'
+    assert len(fig.data[0].y) == 2_000
+    assert fig.layout.title.text == '<sup>WebGL</sup>'
+
+
+def test_stacked_areas_stay_svg_and_share_their_x_values():
+    x, _ = noisy_line(30_000)
+    rng = np.random.default_rng(1)
+    fig = go.Figure([go.Scatter(x=x, y=rng.random(len(x)), stackgroup='one', name=name) for name in 'ab'])
+    downsample.reduce_figure(fig, max_points=2_000)
+    assert [t.type for t in fig.data] == ['scatter', 'scatter']
+    assert list(fig.data[0].x) == list(fig.data[1].x)
+    assert sum(len(t.y) for t in fig.data) <= 2_000 + 4
+    assert 'min-max' in fig.layout.title.text
+
+
+def test_scatter_with_unordered_x_is_not_decimated():
+    rng = np.random.default_rng(2)
+    fig = go.Figure([go.Scatter(x=rng.random(20_000), y=rng.random(20_000), mode='markers')])
+    downsample.reduce_figure(fig)
+    assert fig.data[0].type == 'scattergl'
+    assert len(fig.data[0].y) == 20_000
+
+
+def test_budget_shrinks_until_the_figure_fits():
+    x, y = noisy_line(200_000)
+    fig = go.Figure([go.Scatter(x=x, y=y, text=[f"point {i}" for i in range(len(x))])])
+    downsample.reduce_figure(fig, max_bytes=100_000)
+    assert len(fig.to_json()) <= 100_000
+    assert len(fig.data[0].text) == len(fig.data[0].y)
@@ -0,0 +1,57 @@
+import gzip
+import io
+
+import pandas as pd
+import pytest
+
+import dataset
+import exports
+
+
+def test_csv_export_keeps_the_source_values(tmp_path):
+    path = exports.get_export('v1', 'CSV', 'LKA', None, (2000, 2022), directory=str(tmp_path),
+                              path=str(tmp_path / 'no-dataset'))
+    exported = pd.read_csv(path, dtype={'Value': str})
+    source = dataset.read_csv()
+    source = source[source['Year'].between(2000, 2022)].reset_index(drop=True)
+    assert exported['Value'].tolist() == source['Value'].tolist()
+    assert '<0.1' in set(exported['Value'])
+
+
+def test_exports_are_filtered_and_reused(tmp_path):
+    filters = dict(iso3='LKA', categories=['Obesity'], years=(2010, 2015))
+    assert exports.cached_export('v1', 'CSV (gzip)', directory=str(tmp_path), **filters) is None
+    path = exports.get_export('v1', 'CSV (gzip)', directory=str(tmp_path), **filters)
+    with gzip.open(path, 'rt') as f:
+        exported = pd.read_csv(f)
+    assert set(exported['Category']) == {'Obesity'}
+    assert exported['Year'].between(2010, 2015).all()
+    assert exports.cached_export('v1', 'CSV (gzip)', directory=str(tmp_path), **filters) == path
+
+
+def test_parquet_export_keeps_value_as_text(tmp_path):
+    path = exports.get_export('v1', 'Parquet', 'LKA', ['Undernourishment'], None, directory=str(tmp_path))
+    exported = pd.read_parquet(path)
+    assert exported['Value'].map(type).eq(str).all()
+
+
+def test_in_memory_export_matches_the_file(tmp_path):
+    filters = dict(iso3='LKA', categories=['Undernourishment'], years=(2005, 2020))
+    for fmt in exports.FORMATS:
+        path = exports.get_export('v1', fmt, directory=str(tmp_path), **filters)
+        data = exports.export_bytes(fmt, **filters)
+        if fmt == 'Parquet':
+            assert pd.read_parquet(path).equals(pd.read_parquet(io.BytesIO(data)))
+        elif fmt == 'CSV (gzip)':
+            with gzip.open(path, 'rb') as f:
+                assert f.read() == gzip.decompress(data)
+        else:
+            with open(path, 'rb') as f:
+                assert f.read() == data
+
+
+def test_unusable_export_directory_raises_oserror(tmp_path):
+    not_a_directory = tmp_path / 'file'
+    not_a_directory.write_text('')
+    with pytest.raises(OSError):
+        exports.cached_export('v1', 'CSV', directory=str(not_a_directory / 'exports'))
@@ -0,0 +1,86 @@
+import plotly.graph_objects as go
+import pytest
+
+import disk_cache
+from figure_cache import FigureCache
+
+
+def payload(size, fill='x'):
+    return fill * size
+
+
+def test_entry_limit_evicts_least_recently_used_first():
+    cache = FigureCache(max_entries=2)
+    cache.put('a', payload(10))
+    cache.put('b', payload(10))
+    assert cache.get_json('a') is not None
+    cache.put('c', payload(10))
+
+    assert cache.get_json('b') is None
+    assert cache.get_json('a') is not None
+    assert cache.get_json('c') is not None
+    assert cache.stats()['evictions'] == 1
+    assert len(cache) == 2
+
+
+def test_byte_budget_evicts_until_the_entries_fit():
+    cache = FigureCache(max_entries=10, max_bytes=100)
+    for key in 'abc':
+        cache.put(key, payload(40))
+    stats = cache.stats()
+    assert stats['entries'] == 2 and stats['bytes'] == 80
+    assert cache.get_json('a') is None
+
+    # Replacing an entry counts only its new size
+    cache.put('c', payload(10))
+    assert cache.stats()['bytes'] == 50
+
+
+def test_entry_larger_than_the_budget_is_returned_but_not_kept():
+    cache = FigureCache(max_bytes=100)
+    cache.put('small', payload(50))
+    assert cache.put('huge', payload(500)) == payload(500)
+    assert cache.get_json('huge') is None
+    assert cache.get_json('small') is not None
+    assert cache.stats()['evictions'] == 0
+
+
+def test_figures_round_trip():
+    cache = FigureCache()
+    fig = go.Figure(go.Bar(x=['a', 'b'], y=[1, 2]), layout={'title_text': 'Bars'})
+    cache.put(('spec', 'v1'), fig)
+    restored = cache.get(('spec', 'v1'))
+    assert restored.layout.title.text == 'Bars'
+    assert list(restored.data[0].y) == [1, 2]
+
+
+def test_stats_count_hits_misses_and_disk_hits(tmp_path):
+    disk = disk_cache.DiskCache(str(tmp_path / 'cache.sqlite'))
+    writer = FigureCache(disk=disk)
+    writer.put('shared', payload(20))
+
+    # A second process: empty in memory, so the first lookup is served from disk
+    reader = FigureCache(disk=disk)
+    assert reader.get_json('shared') == payload(20)
+    assert reader.get_json('shared') == payload(20)
+    assert reader.get_json('missing') is None
+
+    stats = reader.stats()
+    assert (stats['hits'], stats['disk_hits'], stats['misses']) == (2, 1, 1)
+    assert stats['hit_rate'] == pytest.approx(2 / 3)
+    assert stats['entries'] == 1
+
+
+def test_disk_figures_are_purged_with_their_source(tmp_path):
+    source = tmp_path / 'data.csv'
+    source.write_text('a\n1\n')
+    disk = disk_cache.DiskCache(str(tmp_path / 'cache.sqlite'))
+    old = disk_cache.file_fingerprint(str(source))
+    FigureCache(disk=disk).put('chart', payload(20), old)
+    assert FigureCache(disk=disk).get_json('chart', old) == payload(20)
+
+    source.write_text('a\n2\n')
+    new = disk_cache.file_fingerprint(str(source))
+    disk.put('store', 'LKA', b'rebuilt', new)
+    assert disk.stats()['namespaces'] == {'store': {'entries': 1, 'bytes': 7}}
+    assert FigureCache(disk=disk).get_json('chart', old) is None
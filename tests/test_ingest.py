@@ -0,0 +1,135 @@
+import os
+
+import pandas as pd
+import pytest
+
+import dataset
+import ingest
+
+
+RAW_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ingest.RAW_CSV_PATH)
+
+
+@pytest.fixture
+def raw_lines():
+    with open(RAW_PATH, 'rb') as f:
+        return f.read().splitlines(keepends=True)
+
+
+def write(path, lines):
+    with open(path, 'wb') as f:
+        f.writelines(lines)
+
+
+def read_output(path):
+    return pd.read_csv(path, dtype={'Value': str})
+
+
+def test_full_ingest_matches_the_cleaned_csv(tmp_path):
+    out = str(tmp_path / 'cleaned.csv')
+    results = ingest.ingest([RAW_PATH], out, chunksize=200)
+    cleaned = dataset.read_csv()
+    output = read_output(out)
+    assert results[RAW_PATH] == len(cleaned)
+    columns = ['Iso3', 'Item', 'Element', 'Year', 'Unit', 'Value', 'Category']
+    pd.testing.assert_frame_equal(output[columns], cleaned[columns])
+
+
+def test_unchanged_input_is_skipped(tmp_path, monkeypatch):
+    out = str(tmp_path / 'cleaned.csv')
+    ingest.ingest([RAW_PATH], out)
+    before = open(out, 'rb').read()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("an unchanged file was read again")
+
+    monkeypatch.setattr(ingest, 'read_raw_chunks', fail)
+    assert ingest.ingest([RAW_PATH], out) == {RAW_PATH: 0}
+    assert open(out, 'rb').read() == before
+
+
+def test_appended_rows_are_read_from_the_previous_end(tmp_path, raw_lines, monkeypatch):
+    raw, out = str(tmp_path / 'raw.csv'), str(tmp_path / 'cleaned.csv')
+    head = raw_lines[:600]
+    write(raw, head)
+    first = ingest.ingest([raw], out)[raw]
+
+    offsets = []
+    read_raw_chunks = ingest.read_raw_chunks
+
+    def recording(path, offset=0, chunksize=ingest.DEFAULT_CHUNKSIZE):
+        offsets.append(offset)
+        return read_raw_chunks(path, offset, chunksize)
+
+    monkeypatch.setattr(ingest, 'read_raw_chunks', recording)
+    write(raw, raw_lines)
+    second = ingest.ingest([raw], out)[raw]
+    assert offsets == [sum(len(line) for line in head)]
+
+    full_out = str(tmp_path / 'full.csv')
+    ingest.ingest([RAW_PATH], full_out)
+    output, full = read_output(out), read_output(full_out)
+    assert first + second == len(output)
+    # Appended rows for an indicator only count past its watermark, so the
+    # output holds the same rows as a full ingest, possibly in another order
+    key = ['Item', 'Element', 'Year']
+    assert sorted(map(tuple, output[key + ['Value']].values.tolist())) == \
+        sorted(map(tuple, full[key + ['Value']].values.tolist()))
+
+
+def test_rewritten_input_only_adds_years_past_the_watermarks(tmp_path, raw_lines):
+    raw, out = str(tmp_path / 'raw.csv'), str(tmp_path / 'cleaned.csv')
+    write(raw, raw_lines)
+    ingest.ingest([raw], out)
+    rows = len(read_output(out))
+
+    # Same rows in another order: nothing is past a watermark, so nothing is added
+    write(raw, raw_lines[:2] + raw_lines[:1:-1])
+    assert ingest.ingest([raw], out) == {raw: 0}
+    assert len(read_output(out)) == rows
+
+    # --full rebuilds from scratch
+    assert ingest.ingest([raw], out, full=True)[raw] == rows
+    assert len(read_output(out)) == rows
+
+
+def test_interrupted_run_does_not_append_rows_twice(tmp_path, raw_lines, monkeypatch):
+    raw, out = str(tmp_path / 'raw.csv'), str(tmp_path / 'cleaned.csv')
+    write(raw, raw_lines[:300])
+    ingest.ingest([raw], out)
+    write(raw, raw_lines)
+
+    append = ingest._append
+    calls = []
+
+    def interrupted(chunk, out_path):
+        calls.append(1)
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        append(chunk, out_path)
+
+    monkeypatch.setattr(ingest, '_append', interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        ingest.ingest([raw], out, chunksize=200)
+    monkeypatch.setattr(ingest, '_append', append)
+
+    ingest.ingest([raw], out, chunksize=200)
+    output = read_output(out)
+    assert not output.duplicated(['Item', 'Element', 'Year']).any()
+    assert len(output) == len(dataset.read_csv())
+
+
+def test_failing_later_input_keeps_the_earlier_ones(tmp_path, raw_lines):
+    first, second, out = str(tmp_path / 'a.csv'), str(tmp_path / 'b.csv'), str(tmp_path / 'cleaned.csv')
+    write(first, raw_lines[:2])
+    write(second, raw_lines[:2])
+    ingest.ingest([first, second], out)
+
+    write(first, raw_lines)
+    write(second, [b'not,a,suite,file\n'])
+    with pytest.raises(Exception):
+        ingest.ingest([first, second], out)
+    assert ingest.ingest([first], out) == {first: 0}
+    output = read_output(out)
+    assert not output.duplicated(['Item', 'Element', 'Year']).any()
+    assert len(output) == len(dataset.read_csv())
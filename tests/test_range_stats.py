@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from range_stats import RangeStats
+
+
+@pytest.fixture(scope='module')
+def panel():
+    rng = np.random.default_rng(7)
+    years = pd.RangeIndex(2000, 2024, name='Year')
+    values = rng.normal(1_000, 150, size=(len(years), 4))
+    values[rng.random(values.shape) < 0.3] = np.nan
+    values[:6, 2] = np.nan
+    values[:, 3] = np.nan
+    values[10, 3] = 5.0
+    return pd.DataFrame(values, index=years, columns=['a', 'b', 'c', 'd'])
+
+
+def ranges(panel):
+    years = list(panel.index)
+    return [(lo, hi) for i, lo in enumerate(years) for hi in years[i:]]
+
+
+# Series.dropna().pct_change(), which pandas 2.1 cannot take of an empty series
+def growth_of(series):
+    series = series.dropna()
+    return series.pct_change() if len(series) else series
+
+
+def assert_close(actual, expected):
+    if np.isnan(expected):
+        assert np.isnan(actual)
+    else:
+        assert actual == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+
+def test_moments_match_pandas_for_every_range(panel):
+    stats = RangeStats(panel)
+    for years in ranges(panel):
+        window = panel.loc[years[0]:years[1]]
+        for column in panel.columns:
+            series = window[column]
+            assert stats.count(column, years) == series.count()
+            assert_close(stats.mean(column, years), series.mean())
+            assert_close(stats.std(column, years), series.std())
+
+
+def test_growth_matches_pct_change_for_every_range(panel):
+    stats = RangeStats(panel)
+    for column in panel.columns:
+        mean_table, std_table = stats.growth_tables(column)
+        for years in ranges(panel):
+            growth = growth_of(panel.loc[years[0]:years[1], column])
+            assert_close(stats.growth_mean(column, years), growth.mean())
+            assert_close(stats.growth_std(column, years), growth.std())
+            first, last = years[0] - 2000, years[1] - 2000
+            assert_close(mean_table[first, last], growth.mean())
+            assert_close(std_table[first, last], growth.std())
+
+
+def test_correlations_match_pairwise_complete_pandas(panel):
+    stats = RangeStats(panel)
+    columns = list(panel.columns)
+    for years in ranges(panel):
+        expected = panel.loc[years[0]:years[1]].corr()
+        matrix = stats.corr_matrix(columns, years)
+        for a in columns:
+            for b in columns:
+                assert_close(matrix.loc[a, b], expected.loc[a, b])
+        assert_close(stats.corr('a', 'b', years), expected.loc['a', 'b'])
+
+
+def test_ranges_outside_the_data_are_empty(panel):
+    stats = RangeStats(panel)
+    assert stats.count('a', (1980, 1990)) == 0
+    assert np.isnan(stats.mean('a', (2030, 2040)))
+    assert stats.count('a') == panel['a'].count()
+
+
+def test_last_observed_row(panel):
+    stats = RangeStats(panel)
+    rows = stats.last_observed('d')
+    assert list(rows[:10]) == [-1] * 10
+    assert set(rows[10:]) == {10}
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+import charts
+import dataset
+import report
+from indicator_store import IndicatorStore
+
+
+@pytest.fixture(scope='module')
+def store():
+    lka = dataset.read_csv()
+    # A second country without GDP data, as real multi-country suites have
+    other = lka[lka['Category'] != 'GDP per capita'].assign(Iso3='AAA')
+    return IndicatorStore(pd.concat([lka, other], ignore_index=True))
+
+
+def test_country_without_an_indicator_renders_na_metrics(store, tmp_path):
+    view = store.for_country('AAA')
+    years = view.year_bounds()
+    metric = charts.RangeMetric("GDP growth", 'GDP per capita', 'growth_mean', None)
+    assert charts.metric_value(view, metric, years) == "n/a"
+    assert charts.metric_value(view, metric._replace(stat='latest'), years) == "n/a"
+
+    parts, _ = report.render_sections(view, years, False, str(tmp_path))
+    page = '\n'.join(parts)
+    assert 'Average Annual GDP Growth Rate' in page and 'n/a' in page
+
+
+def test_country_with_the_indicator_renders_values(store, tmp_path):
+    view = store.for_country('LKA')
+    metric = charts.RangeMetric("GDP growth", 'GDP per capita', 'growth_mean', None)
+    assert charts.metric_value(view, metric, view.year_bounds()).endswith('%')
+
+
+@pytest.mark.parametrize('value, window', [
+    ('all', (2000, 2023)),
+    ('1990-2005', (2000, 2005)),
+    ('2010-2030', (2010, 2023)),
+    ('2012-2012', (2012, 2012)),
+])
+def test_windows_are_clamped_to_the_data(value, window):
+    assert report.parse_windows([value], (2000, 2023)) == [window]
+
+
+@pytest.mark.parametrize('value', ['2010-2005', '1990-1995', '2030-2040', 'recent'])
+def test_bad_windows_are_rejected(value):
+    with pytest.raises(SystemExit):
+        report.parse_windows([value], (2000, 2023))
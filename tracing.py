@@ -0,0 +1,107 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+
+MAX_RECORDS = 10_000
+
+_enabled = os.environ.get('DASHBOARD_TRACE', '0') not in ('', '0')
+_records = deque(maxlen=MAX_RECORDS)
+_lock = threading.Lock()
+
+
+def enabled():
+    return _enabled
+
+
+# Turn tracing on or off at runtime; allocation deltas need tracemalloc running
+def enable(on=True):
+    global _enabled
+    _enabled = on
+    if on and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+class Span:
+    """One timed step. Callers fill in rows and payload_bytes when they know them."""
+
+    __slots__ = ('name', 'rows', 'payload_bytes')
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self.payload_bytes = None
+
+
+@contextmanager
+def span(name, rows=None):
+    """Time the enclosed block and record it. Yields None when tracing is off,
+    so callers can skip any extra measuring work with `if s:`."""
+    if not _enabled:
+        yield None
+        return
+
+    current = Span(name, rows)
+    alloc_start = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+    started = time.time()
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        alloc = tracemalloc.get_traced_memory()[0] - alloc_start if alloc_start is not None else None
+        record = {
+            'name': current.name,
+            'ts': round(started, 6),
+            'ms': round(elapsed, 3),
+            'rows': current.rows,
+            'payload_bytes': current.payload_bytes,
+            'alloc_bytes': alloc,
+            'thread': threading.current_thread().name,
+        }
+        with _lock:
+            _records.append(record)
+
+
+def records():
+    with _lock:
+        return list(_records)
+
+
+def clear():
+    with _lock:
+        _records.clear()
+
+
+# p50/p95 latency and mean size figures per span name, slowest p95 first
+def summary():
+    import numpy as np
+    import pandas as pd
+    frame = pd.DataFrame(records(), columns=['name', 'ts', 'ms', 'rows', 'payload_bytes', 'alloc_bytes', 'thread'])
+    if frame.empty:
+        return pd.DataFrame(columns=['span', 'count', 'p50_ms', 'p95_ms', 'max_ms', 'total_ms',
+                                     'rows', 'payload_bytes', 'alloc_bytes'])
+    grouped = frame.groupby('name')
+    result = pd.DataFrame({
+        'count': grouped['ms'].size(),
+        'p50_ms': grouped['ms'].agg(lambda ms: np.percentile(ms, 50)),
+        'p95_ms': grouped['ms'].agg(lambda ms: np.percentile(ms, 95)),
+        'max_ms': grouped['ms'].max(),
+        'total_ms': grouped['ms'].sum(),
+        'rows': grouped['rows'].mean(),
+        'payload_bytes': grouped['payload_bytes'].mean(),
+        'alloc_bytes': grouped['alloc_bytes'].mean(),
+    })
+    return result.sort_values('p95_ms', ascending=False).rename_axis('span').reset_index()
+
+
+def to_jsonl():
+    return "".join(json.dumps(record) + "\n" for record in records())
+
+
+if _enabled:
+    enable()